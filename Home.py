@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import streamlit as st
 import numpy as np
-import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 
 st.set_page_config(
     page_title="Toyota Gazoo Racing — Barber Telemetry ML Lab",
@@ -35,49 +35,73 @@ st.markdown("---")
 # Animated Barber Track Section (with trail)
 # ==========================================================
 
-def animated_barber_mock_track():
-    """Animated Barber Motorsports Park lap with trailing line."""
+@st.cache_data(show_spinner=False)
+def _barber_track_fig_json() -> str:
+    """Build the animated track figure once and cache its JSON."""
     t = np.linspace(0, 2 * np.pi, 350)
     radius = 1 + 0.25 * np.sin(3 * t) + 0.1 * np.sin(7 * t)
 
     x = radius * np.cos(t) * 1.2
     y = radius * np.sin(t)
 
-    df = pd.DataFrame({
-        "x": x,
-        "y": y,
-        "frame": np.arange(len(t))
-    })
-
-    fig = px.scatter(
-        df,
-        x="x",
-        y="y",
-        animation_frame="frame",
-        range_x=[-2, 2],
-        range_y=[-2, 2],
-        height=420,
-    )
-
-    # trailing line track path
-    fig.add_scatter(
-        x=df["x"],
-        y=df["y"],
-        mode="lines",
-        line=dict(color="#0044CC", width=3),
-        showlegend=False,
+    # one frame per point; each frame only moves the car marker (trace 0)
+    frames = [
+        go.Frame(data=[go.Scatter(x=[x[i]], y=[y[i]])], traces=[0], name=str(i))
+        for i in range(len(t))
+    ]
+
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=[x[0]],
+                y=[y[0]],
+                mode="markers",
+                marker=dict(size=12, color="#FF0000"),
+            ),
+            # trailing line track path
+            go.Scatter(
+                x=x,
+                y=y,
+                mode="lines",
+                line=dict(color="#0044CC", width=3),
+            ),
+        ],
+        frames=frames,
     )
 
-    fig.update_traces(marker=dict(size=12, color="#FF0000"))
-
     fig.update_layout(
         title="Animated Track — Barber Motorsports Park",
-        xaxis_title="",
-        yaxis_title="",
+        xaxis=dict(range=[-2, 2], title=""),
+        yaxis=dict(range=[-2, 2], title=""),
+        height=420,
         showlegend=False,
         margin=dict(l=0, r=0, t=40, b=0),
+        updatemenus=[
+            dict(
+                type="buttons",
+                showactive=False,
+                buttons=[
+                    dict(
+                        label="Play",
+                        method="animate",
+                        args=[None, dict(frame=dict(duration=30, redraw=False), fromcurrent=True)],
+                    ),
+                    dict(
+                        label="Pause",
+                        method="animate",
+                        args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")],
+                    ),
+                ],
+            )
+        ],
     )
 
+    return fig.to_json()
+
+
+def animated_barber_mock_track():
+    """Animated Barber Motorsports Park lap with trailing line."""
+    fig = pio.from_json(_barber_track_fig_json())
     st.plotly_chart(fig, use_container_width=True)
 
 
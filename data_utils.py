@@ -8,23 +8,98 @@ from typing import Iterable, List, Tuple
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+
+try:
+    import polars as pl
+except ImportError:  # optional; clean_numeric falls back to pandas
+    pl = None
 
 
 def clean_numeric(df: pd.DataFrame) -> pd.DataFrame:
     """
     Convert numeric-looking columns to numeric dtypes and drop completely empty columns.
+    Columns come back Arrow-backed, which Streamlit can serialize without conversion,
+    and float columns are downcast to float32.
     Does not mutate the original dataframe.
+
+    When Polars is installed, string columns holding only plain decimal numbers
+    are parsed by it (multi-threaded); everything else goes through
+    pd.to_numeric, so the result is the same with or without Polars.
     """
-    df = df.copy()
-    for col in df.columns:
-        if df[col].dtype == "object":
-            # Try numeric conversion, but silently ignore if not possible
-            try:
-                df[col] = pd.to_numeric(df[col])
-            except Exception:
-                pass
+    df = df.convert_dtypes(dtype_backend="pyarrow", convert_integer=False)
     df = df.dropna(axis=1, how="all")
-    return df
+
+    parsed = {}
+    text_cols = [c for c in df.columns if df[c].dtype == "string[pyarrow]"]
+    if pl is not None and text_cols and df.columns.is_unique:
+        try:
+            parsed = _parse_plain_numbers_polars(df[text_cols])
+        except (pl.exceptions.PolarsError, pa.ArrowException):
+            parsed = {}
+
+    # Only columns whose dtype actually changes are rebuilt; no full-frame copy
+    converted = {}
+    for col in df.columns:
+        new = parsed[col] if col in parsed else _to_numeric_or_keep(df[col])
+        # Telemetry channels fit comfortably in float32; halves memory and payloads
+        if pd.api.types.is_float_dtype(new.dtype):
+            new = new.astype("float[pyarrow]")
+        if new.dtype != df[col].dtype:
+            converted[col] = new
+    return df.assign(**converted)
+
+
+# Text pd.to_numeric and Polars' casts read identically: no padding, empty
+# strings, "NaN"/"inf", hex or thousands separators ([0-9], not Unicode \d)
+_INT_TEXT = r"^[+-]?[0-9]+$"
+_FLOAT_TEXT = r"^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$"
+
+
+def _parse_plain_numbers_polars(text: pd.DataFrame) -> dict[str, pd.Series]:
+    """
+    Numeric versions of the string columns whose values are all plain numbers.
+
+    Columns with any other text are left out for pd.to_numeric to decide, so
+    every column returned is converted exactly as the pandas path would.
+    """
+    pdf = pl.from_pandas(text)
+    checks = pdf.select(
+        *[
+            (
+                pl.col(c).str.contains(_INT_TEXT).all()
+                # no int64 overflow (to_numeric would go to uint64/float there)
+                & (pl.col(c).cast(pl.Int64, strict=False).null_count() == pl.col(c).null_count())
+            ).alias(f"int:{c}")
+            for c in pdf.columns
+        ],
+        *[pl.col(c).str.contains(_FLOAT_TEXT).all().alias(f"float:{c}") for c in pdf.columns],
+        *[pl.col(c).str.contains(_INT_TEXT).all().alias(f"intlike:{c}") for c in pdf.columns],
+    ).row(0, named=True)
+
+    casts = {}
+    for c in pdf.columns:
+        if checks[f"int:{c}"]:
+            casts[c] = pl.col(c).cast(pl.Int64)
+        elif checks[f"float:{c}"] and not checks[f"intlike:{c}"]:
+            casts[c] = pl.col(c).cast(pl.Float64)
+    if not casts:
+        return {}
+
+    out = pdf.select(list(casts.values())).to_pandas(use_pyarrow_extension_array=True)
+    out.index = text.index
+    return {c: out[c] for c in casts}
+
+
+def _to_numeric_or_keep(col: pd.Series) -> pd.Series:
+    """Numeric conversion for string columns; anything else is returned unchanged."""
+    if not pd.api.types.is_string_dtype(col.dtype):
+        return col
+    # Equivalent of errors="ignore", which newer pandas no longer accepts
+    try:
+        return pd.to_numeric(col, dtype_backend="pyarrow")
+    except (ValueError, TypeError):
+        return col
 
 
 def add_fast_slow_label(
@@ -40,7 +115,6 @@ def add_fast_slow_label(
         Laps with target_col < median are labeled 1 (fast), others 0 (slow).
     Otherwise, threshold can be a numeric value.
     """
-    df = df.copy()
     if target_col not in df.columns:
         raise ValueError(f"Column '{target_col}' not found in dataframe.")
 
@@ -49,8 +123,9 @@ def add_fast_slow_label(
     else:
         thr_value = float(threshold)
 
-    df[label_col] = (df[target_col] < thr_value).astype(int)
-    return df
+    # Missing targets count as slow (0); assign adds the column without a full copy
+    is_fast = (df[target_col] < thr_value).fillna(False).astype("int8")
+    return df.assign(**{label_col: is_fast})
 
 
 def pivot_trd_long_to_wide(
@@ -74,14 +149,14 @@ def pivot_trd_long_to_wide(
     if missing:
         raise ValueError(f"Missing required columns for pivot: {missing}")
 
+    # groupby-mean-unstack is pivot_table(aggfunc="mean") without its overhead;
+    # dropping all-NaN channels matches pivot_table's dropna=True default
     df_pivot = (
         df_long
-        .pivot_table(
-            index=list(index_cols),
-            columns=channel_col,
-            values=value_col,
-            aggfunc="mean",
-        )
+        .groupby([*index_cols, channel_col], observed=True)[value_col]
+        .mean()
+        .unstack(channel_col)
+        .dropna(axis=1, how="all")
         .reset_index()
     )
 
@@ -104,8 +179,7 @@ def train_test_indices(
     Returns (train_idx, test_idx) as arrays of indices.
     """
     rng = np.random.default_rng(random_state)
-    indices = np.arange(n_samples)
-    rng.shuffle(indices)
+    indices = rng.permutation(n_samples)
 
     split = int((1.0 - test_size) * n_samples)
     train_idx = indices[:split]
@@ -7,16 +7,121 @@ barber/barber_sample.csv instead of expecting a data/ folder.
 
 from __future__ import annotations
 
+import io
+import json
+import os
+import uuid
 from pathlib import Path
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 
 
 # ---------- Local CSV loading ----------
 
-@st.cache_data(show_spinner=True)
+# Known columns of the Barber telemetry export, parsed straight to these types
+# (absent columns are ignored; float32 matches what clean_numeric produces)
+TELEMETRY_DTYPES = {
+    "lap": "int32[pyarrow]",
+    "outing": "int32[pyarrow]",
+    "vehicle_number": "int32[pyarrow]",
+    "telemetry_value": "float[pyarrow]",
+}
+
+
+def _read_csv_arrow(source, dtype: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Parse a CSV with the pyarrow engine into Arrow-backed columns.
+
+    If the file does not fit `dtype` (e.g. a non-numeric "lap" column in an
+    upload), it is re-read with type inference instead of failing.
+    """
+    if dtype:
+        try:
+            return pd.read_csv(
+                source, engine="pyarrow", dtype_backend="pyarrow", dtype=dtype
+            )
+        except ValueError:
+            if hasattr(source, "seek"):
+                source.seek(0)
+    return pd.read_csv(source, engine="pyarrow", dtype_backend="pyarrow")
+
+
+# Schema metadata key holding the `dtype` a sidecar was parsed with
+_DTYPE_METADATA_KEY = b"read_csv_cached.dtype"
+
+
+def read_csv_cached(path: Path, dtype: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Read a CSV, keeping a Parquet copy next to it for faster reloads.
+
+    The Parquet file is reused while it is newer than the CSV and was written
+    with the same `dtype` (recorded in its schema metadata); otherwise the
+    CSV is parsed and the Parquet copy is (re)written. If the copy cannot be
+    read (e.g. left truncated by a crash) the CSV is parsed again; if it
+    cannot be written (e.g. read-only checkout), the CSV result is returned
+    as-is.
+    """
+    path = Path(path)
+    parquet_path = path.with_suffix(".parquet")
+    dtype_key = json.dumps(dtype or {}, sort_keys=True).encode()
+
+    if (
+        parquet_path.exists()
+        and parquet_path.stat().st_mtime >= path.stat().st_mtime
+    ):
+        try:
+            metadata = pq.read_schema(parquet_path).metadata or {}
+            if metadata.get(_DTYPE_METADATA_KEY) == dtype_key:
+                return pd.read_parquet(
+                    parquet_path, engine="pyarrow", dtype_backend="pyarrow"
+                )
+        except (OSError, pa.ArrowException):
+            pass
+
+    df = _read_csv_arrow(path, dtype)
+    _write_parquet_atomic(df, parquet_path, {_DTYPE_METADATA_KEY: dtype_key})
+    return df
+
+
+def _write_parquet_atomic(
+    df: pd.DataFrame, parquet_path: Path, metadata: Optional[dict] = None
+) -> None:
+    """
+    Write df to parquet_path via a temp file in the same directory.
+
+    os.replace swaps it in atomically, so a killed process or a concurrent
+    writer never leaves a partial file at parquet_path. `metadata` is merged
+    into the schema metadata. Write failures are ignored; the temp file is
+    removed.
+    """
+    tmp_path = None
+    try:
+        # A unique name of our own rather than mkstemp, whose 0600 mode would
+        # survive os.replace; written normally, the file gets the umask mode
+        tmp_path = parquet_path.with_name(
+            f".{parquet_path.stem}.{os.getpid()}.{uuid.uuid4().hex}.parquet"
+        )
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), **(metadata or {})}
+        )
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, parquet_path)
+        tmp_path = None
+    except (OSError, pa.ArrowException):
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
 def load_sample_barber_telemetry(
     csv_path: str = "barber/barber_sample.csv",
 ) -> pd.DataFrame:
@@ -25,6 +130,10 @@ def load_sample_barber_telemetry(
 
     Updated: This now points to your actual file:
         barber/barber_sample.csv
+
+    Cached with cache_resource on (path, mtime): every caller gets the same
+    dataframe until the file changes, so derive new frames from it rather
+    than modifying it in place.
     """
     path = Path(csv_path)
     if not path.exists():
@@ -33,8 +142,30 @@ def load_sample_barber_telemetry(
             "Either place your CSV there, or update 'csv_path' in load_sample_barber_telemetry()."
         )
 
-    df = pd.read_csv(path)
-    return df
+    return _load_sample_barber_telemetry(str(path), path.stat().st_mtime)
+
+
+@st.cache_resource(show_spinner=True)
+def _load_sample_barber_telemetry(csv_path: str, csv_mtime: float) -> pd.DataFrame:
+    """Cached body of load_sample_barber_telemetry; csv_mtime only keys the cache."""
+    return read_csv_cached(Path(csv_path), dtype=TELEMETRY_DTYPES)
+
+
+@st.cache_resource(
+    show_spinner=True,
+    max_entries=4,  # uploads are full telemetry files; keep only a few
+)
+def load_uploaded_telemetry(data: bytes) -> pd.DataFrame:
+    """
+    Parse an uploaded telemetry CSV, cached on the file's bytes.
+
+    Streamlit reruns hand back a new UploadedFile object for the same upload,
+    so keying on the content means an unchanged upload is parsed only once.
+    cache_resource rather than cache_data so a rerun gets the parsed frame
+    back without unpickling a copy; derive new frames from it rather than
+    modifying it in place.
+    """
+    return _read_csv_arrow(io.BytesIO(data), TELEMETRY_DTYPES)
 
 
 # ---------- Optional fastf1 integration ----------
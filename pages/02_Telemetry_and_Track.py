@@ -9,17 +9,27 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
-from f1_api import load_sample_barber_telemetry
+from f1_api import load_sample_barber_telemetry, read_csv_cached
 from data_utils import clean_numeric
+from utils.downsample import MAX_LINE_POINTS, lttb_indices
+from utils.kernels import lap_duration_mask, to_epoch_ns, zscore_array
+
+# Optional Polars (faster lap aggregation); pandas is the fallback
+try:
+    import polars as pl
+except Exception:
+    pl = None
 
 # Optional Plotly
 try:
     import plotly.express as px
+    import plotly.io as pio
 except Exception:
     px = None
 
 
 SESSION_LABEL = "R1"  # Hard-coded for this page
+SAMPLE_CSV_PATH = Path("barber") / "barber_sample.csv"
 
 
 # ---------------------------------------------------------------------
@@ -49,7 +59,7 @@ This page shows:
 # Helpers — Load lap and telemetry data
 # ---------------------------------------------------------------------
 
-@st.cache_data(show_spinner=True)
+@st.cache_resource(show_spinner=True)
 def load_r1_lap_files() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """Load R1 lap_start, lap_end, lap_time CSV files."""
     base = Path("barber")
@@ -64,80 +74,135 @@ def load_r1_lap_files() -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         )
 
     return (
-        pd.read_csv(start_path),
-        pd.read_csv(end_path),
-        pd.read_csv(time_path),
+        read_csv_cached(start_path),
+        read_csv_cached(end_path),
+        read_csv_cached(time_path),
     )
 
 
-@st.cache_data(show_spinner=True)
-def build_r1_lap_summary() -> pd.DataFrame:
-    """Generate cleaned lap summary for R1."""
-    start_df, end_df, time_df = load_r1_lap_files()
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    """
+    Parse TRD timestamps (ISO 8601, e.g. 2025-09-05T00:28:20.593Z) as UTC.
 
-    # Parse timestamps
-    for df in (start_df, end_df, time_df):
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    A fixed format skips per-value inference and cache=True parses repeated
+    strings once; columns the pyarrow reader already typed pass straight through.
+    """
+    return pd.to_datetime(
+        values, format="ISO8601", errors="coerce", utc=True, cache=True
+    )
 
-    group_keys = ["lap", "vehicle_id", "vehicle_number", "outing"]
 
-    # Earliest start per lap
-    start_agg = (
-        start_df.groupby(group_keys, as_index=False)["timestamp"]
-        .min()
-        .rename(columns={"timestamp": "timestamp_start"})
+def _lap_bounds_pandas(
+    start_df: pd.DataFrame,
+    end_df: pd.DataFrame,
+    time_df: pd.DataFrame,
+    group_keys: list[str],
+) -> pd.DataFrame:
+    """Per-lap timestamp bounds from one groupby over the tagged lap files."""
+    # Group order is irrelevant until the final sort, so skip groupby's sorting
+    tagged = pd.concat(
+        {
+            "timestamp_start": start_df,
+            "timestamp_end": end_df,
+            "timestamp_lap": time_df,
+        },
+        names=["kind"],
     )
-
-    # Latest end per lap
-    end_agg = (
-        end_df.groupby(group_keys, as_index=False)["timestamp"]
-        .max()
-        .rename(columns={"timestamp": "timestamp_end"})
+    tagged["vehicle_id"] = tagged["vehicle_id"].astype("category")
+    agg = tagged.groupby(
+        [*group_keys, "kind"], sort=False, observed=True
+    )["timestamp"].agg(["min", "max"])
+    is_start = agg.index.get_level_values("kind") == "timestamp_start"
+    lap = (
+        agg["max"].where(~is_start, agg["min"])
+        .unstack("kind")
+        .reindex(columns=["timestamp_start", "timestamp_end", "timestamp_lap"])
+        .dropna(subset=["timestamp_start", "timestamp_end"])
+        .reset_index()
     )
+    lap.columns.name = None
+    return lap
+
+
+def _lap_bounds_polars(
+    start_df: pd.DataFrame,
+    end_df: pd.DataFrame,
+    time_df: pd.DataFrame,
+    group_keys: list[str],
+) -> pd.DataFrame:
+    """Same bounds as _lap_bounds_pandas, as one lazy multi-threaded Polars plan."""
+    def bound(df: pd.DataFrame, how: str, name: str) -> pl.LazyFrame:
+        return (
+            pl.from_pandas(df[[*group_keys, "timestamp"]])
+            .lazy()
+            .group_by(group_keys)
+            .agg(getattr(pl.col("timestamp"), how)().alias(name))
+        )
 
-    # Last lap-time per lap (optional)
-    time_agg = (
-        time_df.groupby(group_keys, as_index=False)["timestamp"]
-        .max()
-        .rename(columns={"timestamp": "timestamp_lap"})
+    lap = (
+        bound(start_df, "min", "timestamp_start")
+        .join(bound(end_df, "max", "timestamp_end"), on=group_keys, how="inner")
+        .join(bound(time_df, "max", "timestamp_lap"), on=group_keys, how="left")
+        .collect()
+        .to_pandas(use_pyarrow_extension_array=True)
     )
+    lap["vehicle_id"] = lap["vehicle_id"].astype("category")
+    return lap
 
-    # Merge aggregates
-    lap = (
-        start_agg.merge(end_agg, on=group_keys, how="inner")
-                 .merge(time_agg, on=group_keys, how="left")
+
+@st.cache_resource(show_spinner=True)
+def build_r1_lap_summary() -> pd.DataFrame:
+    """
+    Generate cleaned lap summary for R1.
+
+    The result is shared across reruns (cache_resource), so callers must
+    treat it as read-only and filter into new frames instead of mutating it.
+    """
+    # Parse timestamps into new frames; the cached lap files are shared
+    start_df, end_df, time_df = (
+        df.assign(timestamp=_parse_timestamps(df["timestamp"]))
+        for df in load_r1_lap_files()
     )
 
+    group_keys = ["lap", "vehicle_id", "vehicle_number", "outing"]
+
+    # Earliest start, latest end, and last lap-time (optional) per lap
+    lap_bounds = _lap_bounds_polars if pl is not None else _lap_bounds_pandas
+    lap = lap_bounds(start_df, end_df, time_df, group_keys)
+
     # Compute duration
-    lap["duration_s"] = (
-        lap["timestamp_end"] - lap["timestamp_start"]
-    ).dt.total_seconds()
+    duration_s, keep = lap_duration_mask(
+        to_epoch_ns(lap["timestamp_start"]),
+        to_epoch_ns(lap["timestamp_end"]),
+        75.0,
+        400.0,
+    )
+    lap["duration_s"] = duration_s
 
     # -------------------------------------------------------------
     # OPTION 1 FILTER: Remove out-laps (duration < 75 sec)
+    # and timestamp anomalies (end not after start)
     # -------------------------------------------------------------
-    lap = lap[(lap["duration_s"] >= 75.0) & (lap["duration_s"] < 400.0)]
-
-    # Remove timestamp anomalies
-    lap = lap[lap["timestamp_end"] > lap["timestamp_start"]]
+    lap = lap[keep]
 
     lap["session"] = SESSION_LABEL
 
-    return lap.sort_values(["vehicle_id", "lap"]).reset_index(drop=True)
+    # Trailing keys keep ties in the order the sorted groupby used to give
+    return (
+        lap.sort_values(["vehicle_id", "lap", "vehicle_number", "outing"])
+        .reset_index(drop=True)
+    )
 
 
 def zscore(series: pd.Series) -> pd.Series:
-    m = series.mean()
-    s = series.std()
-    if s == 0 or np.isnan(s):
-        return pd.Series(np.zeros(len(series)), index=series.index)
-    return (series - m) / s
+    a = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(zscore_array(a), index=series.index)
 
 
-@st.cache_data(show_spinner=True)
-def load_sample_telemetry_r1() -> pd.DataFrame:
-    """Load sample telemetry restricted to R1."""
-    df = load_sample_barber_telemetry()
+@st.cache_resource(show_spinner=True)
+def _r1_telemetry_view(csv_mtime: float, csv_path: str) -> pd.DataFrame:
+    """Parse and filter sample telemetry to R1; csv_mtime only keys the cache."""
+    df = load_sample_barber_telemetry(csv_path)
     df = clean_numeric(df)
 
     if "meta_session" in df.columns:
@@ -145,9 +210,103 @@ def load_sample_telemetry_r1() -> pd.DataFrame:
 
     # Coerce columns
     df["telemetry_value"] = pd.to_numeric(df.get("telemetry_value"), errors="coerce")
-    df["timestamp"] = pd.to_datetime(df.get("timestamp"), errors="coerce")
+    df["timestamp"] = _parse_timestamps(df.get("timestamp"))
 
-    return df
+    # Every filter/groupby on this page keys on the channel name: use int codes
+    if "telemetry_name" in df.columns:
+        df["telemetry_name"] = df["telemetry_name"].astype("category")
+
+    # Sort once here (stable) so per-selection plots only filter, never re-sort
+    sort_cols = [c for c in ("telemetry_name", "lap", "timestamp") if c in df.columns]
+    return df.sort_values(sort_cols, kind="mergesort")
+
+
+def load_sample_telemetry_r1() -> pd.DataFrame:
+    """
+    Load sample telemetry restricted to R1.
+
+    The typed frame is cached on the sample CSV's mtime (so editing the file
+    invalidates it) and kept in session state, so widget reruns skip parsing.
+    """
+    csv_mtime = SAMPLE_CSV_PATH.stat().st_mtime
+    if st.session_state.get("r1_tel_mtime") != csv_mtime:
+        st.session_state["r1_tel"] = _r1_telemetry_view(csv_mtime, str(SAMPLE_CSV_PATH))
+        st.session_state["r1_tel_mtime"] = csv_mtime
+    return st.session_state["r1_tel"]
+
+
+# ---------------------------------------------------------------------
+# Helpers — Cached figures (JSON, so reruns skip Plotly's serialization)
+# ---------------------------------------------------------------------
+
+@st.cache_data(show_spinner=False)
+def _lap_duration_fig_json(
+    laps: Tuple, durations: Tuple, vehicle_ids: Tuple
+) -> str:
+    """Lap duration line chart; plain tuples keep the cache key cheap to hash."""
+    fig = px.line(
+        pd.DataFrame({"lap": laps, "duration_s": durations, "vehicle_id": vehicle_ids}),
+        x="lap",
+        y="duration_s",
+        color="vehicle_id",
+        markers=True,
+        title="Lap Duration — R1",
+    )
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False)
+def _signals_fig_json(csv_mtime: float, laps: Tuple, signals: Tuple) -> str:
+    """Signals-vs-time facets for the selected laps/channels of the R1 view."""
+    sample_df = _r1_telemetry_view(csv_mtime, str(SAMPLE_CSV_PATH))
+    sub = sample_df.loc[
+        (sample_df["lap"].isin(laps)) &
+        (sample_df["telemetry_name"].isin(signals)),
+        ["telemetry_name", "lap", "timestamp", "telemetry_value"],
+    ]
+
+    # Already in (telemetry_name, lap, timestamp) order from _r1_telemetry_view
+    # Vectorized per-group offset: no Python callback per group
+    lap_t0 = sub.groupby(
+        ["telemetry_name", "lap"], observed=True
+    )["timestamp"].transform("min")
+    sub["t_rel_s"] = (sub["timestamp"] - lap_t0).dt.total_seconds()
+
+    # LTTB-downsample each (channel, lap) trace so the figure stays light
+    if len(sub) > MAX_LINE_POINTS:
+        groups = sub.groupby(
+            ["telemetry_name", "lap"], observed=True, sort=False
+        ).indices
+        n_out = max(3, MAX_LINE_POINTS // len(groups))
+        t = sub["t_rel_s"].to_numpy(dtype=np.float64, na_value=np.nan)
+        v = sub["telemetry_value"].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = np.concatenate(
+            [pos[lttb_indices(t[pos], v[pos], n_out)] for pos in groups.values()]
+        )
+        sub = sub.iloc[np.sort(keep)]
+
+    fig = px.line(
+        sub[["t_rel_s", "telemetry_value", "lap", "telemetry_name"]],
+        x="t_rel_s",
+        y="telemetry_value",
+        color="lap",
+        facet_row="telemetry_name",
+        title="Telemetry vs Time",
+    )
+    fig.update_yaxes(matches=None)
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False)
+def _heatmap_fig_json(pivot: pd.DataFrame) -> str:
+    """Lap x signal heatmap; the small pivot itself is the cache key."""
+    fig = px.imshow(
+        pivot.values,
+        x=pivot.columns,
+        y=pivot.index,
+        color_continuous_scale="Viridis",
+    )
+    return fig.to_json()
 
 
 # ---------------------------------------------------------------------
@@ -236,15 +395,12 @@ if view_mode == "Lap Summary":
 
         st.markdown("### Lap Duration vs Lap Number")
         if px:
-            fig = px.line(
-                lap_df,
-                x="lap",
-                y="duration_s",
-                color="vehicle_id",
-                markers=True,
-                title="Lap Duration — R1",
+            fig_json = _lap_duration_fig_json(
+                tuple(lap_df["lap"]),
+                tuple(lap_df["duration_s"]),
+                tuple(lap_df["vehicle_id"]),
             )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
         else:
             st.line_chart(lap_df.set_index("lap")["duration_s"])
 
@@ -290,30 +446,13 @@ if view_mode == "Per-sample Telemetry":
 
             if not selected_laps or not selected_signals:
                 st.info("Select laps and channels.")
-            else:
-                sub = sample_df[
-                    (sample_df["lap"].isin(selected_laps)) &
-                    (sample_df["telemetry_name"].isin(selected_signals))
-                ].copy()
-
-                sub = sub.sort_values(["telemetry_name", "lap", "timestamp"])
-                sub["t_rel_s"] = sub.groupby(
-                    ["telemetry_name", "lap"]
-                )["timestamp"].transform(
-                    lambda x: (x - x.min()).dt.total_seconds()
+            elif px:
+                fig_json = _signals_fig_json(
+                    st.session_state["r1_tel_mtime"],
+                    tuple(selected_laps),
+                    tuple(selected_signals),
                 )
-
-                if px:
-                    fig = px.line(
-                        sub,
-                        x="t_rel_s",
-                        y="telemetry_value",
-                        color="lap",
-                        facet_row="telemetry_name",
-                        title="Telemetry vs Time",
-                    )
-                    fig.update_yaxes(matches=None)
-                    st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
 
         # -----------------------------------------------------------
         # Track Map
@@ -338,24 +477,44 @@ if view_mode == "Per-sample Telemetry":
                 laps_available = sorted(sample_df["lap"].unique().tolist())
                 lap_sel = st.selectbox("Select lap", laps_available)
 
-                lap_pts = sample_df[
+                lap_pts = sample_df.loc[
                     (sample_df["lap"] == lap_sel) &
                     sample_df[lat_col].notna() &
-                    sample_df[lon_col].notna()
-                ].copy()
+                    sample_df[lon_col].notna(),
+                    [lat_col, lon_col],
+                ]
+
+                # Only lat/lon go to the browser, as float32
+                map_df = pd.DataFrame(
+                    {"lat": lap_pts[lat_col], "lon": lap_pts[lon_col]}
+                ).astype("float32")
 
-                map_df = pd.DataFrame({"lat": lap_pts[lat_col], "lon": lap_pts[lon_col]})
+                # Even stride keeps the path shape and caps the points drawn
+                if len(map_df) > MAX_LINE_POINTS:
+                    step = int(np.ceil(len(map_df) / MAX_LINE_POINTS))
+                    map_df = map_df.iloc[::step]
 
                 if px and not map_df.empty:
-                    fig = px.scatter_mapbox(
-                        map_df,
-                        lat="lat",
-                        lon="lon",
-                        zoom=14,
-                        height=500,
-                    )
+                    # scatter_map draws with MapLibre (WebGL); older Plotly has mapbox only
+                    if hasattr(px, "scatter_map"):
+                        fig = px.scatter_map(
+                            map_df,
+                            lat="lat",
+                            lon="lon",
+                            zoom=14,
+                            height=500,
+                        )
+                        fig.update_layout(map_style="open-street-map")
+                    else:
+                        fig = px.scatter_mapbox(
+                            map_df,
+                            lat="lat",
+                            lon="lon",
+                            zoom=14,
+                            height=500,
+                        )
+                        fig.update_layout(mapbox_style="open-street-map")
                     fig.update_traces(mode="lines+markers")
-                    fig.update_layout(mapbox_style="open-street-map")
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.map(map_df)
@@ -367,7 +526,7 @@ if view_mode == "Per-sample Telemetry":
             st.markdown("### Telemetry Heatmap")
 
             tele_stats = (
-                sample_df.groupby("telemetry_name")["telemetry_value"]
+                sample_df.groupby("telemetry_name", observed=True)["telemetry_value"]
                 .agg(["count", "std"])
                 .reset_index()
                 .dropna(subset=["std"])
@@ -385,26 +544,18 @@ if view_mode == "Per-sample Telemetry":
             if not sig_sel:
                 st.info("Select at least one signal.")
             else:
-                heat = (
-                    sample_df[sample_df["telemetry_name"].isin(sig_sel)]
-                    .groupby(["lap", "telemetry_name"])["telemetry_value"]
+                # Filter, aggregate and widen in one pass (no pivot_table regroup)
+                mask = sample_df["telemetry_name"].isin(sig_sel)
+                pivot = (
+                    sample_df.loc[mask, ["lap", "telemetry_name", "telemetry_value"]]
+                    .groupby(["lap", "telemetry_name"], observed=True)["telemetry_value"]
                     .mean()
-                    .reset_index()
-                )
-
-                pivot = heat.pivot_table(
-                    index="lap",
-                    columns="telemetry_name",
-                    values="telemetry_value",
+                    .unstack("telemetry_name")
+                    .astype("float32")
                 )
 
                 if px:
-                    fig = px.imshow(
-                        pivot.values,
-                        x=pivot.columns,
-                        y=pivot.index,
-                        color_continuous_scale="Viridis",
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig_json = _heatmap_fig_json(pivot)
+                    st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
                 else:
                     st.dataframe(pivot.style.background_gradient(cmap="viridis"))
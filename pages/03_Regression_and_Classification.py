@@ -4,8 +4,14 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.ensemble import (
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
 from sklearn.linear_model import Lasso, LinearRegression, Ridge
 from sklearn.metrics import (
     accuracy_score,
@@ -17,8 +23,15 @@ from sklearn.metrics import (
 )
 from sklearn.model_selection import train_test_split
 
-from f1_api import load_sample_barber_telemetry
-from data_utils import clean_numeric, add_fast_slow_label
+from utils.ml_cache import (
+    FRAME_HASH_FUNCS,
+    SAMPLE_SOURCE,
+    UPLOAD_SOURCE,
+    cached_clean_numeric,
+    cached_fast_slow_label,
+    cached_split,
+    load_telemetry,
+)
 
 # ======================================================================
 # PAGE CONFIG
@@ -48,34 +61,25 @@ st.sidebar.header("Data Source")
 
 data_source = st.sidebar.radio(
     "Choose telemetry data source:",
-    ["Sample Barber CSV", "Upload CSV"],
+    [SAMPLE_SOURCE, UPLOAD_SOURCE],
 )
 
 uploaded = None
-if data_source == "Upload CSV":
+if data_source == UPLOAD_SOURCE:
     uploaded = st.sidebar.file_uploader("Upload telemetry CSV", type=["csv"])
 
 
-@st.cache_data(show_spinner=True)
-def _load_data(source: str, file) -> pd.DataFrame:
-    if source == "Sample Barber CSV":
-        return load_sample_barber_telemetry()
-    else:
-        if file is None:
-            return pd.DataFrame()
-        return pd.read_csv(file)
-
-
-df_raw = _load_data(data_source, uploaded)
+df_raw = load_telemetry(data_source, uploaded)
 
 if df_raw.empty:
     st.info("Load a dataset using the sidebar to train ML models.")
     st.stop()
 
 st.subheader("Telemetry Data (Preview)")
-st.dataframe(df_raw.head())
+# Arrow-backed head converts to a Table without copying; Streamlit sends it as-is
+st.dataframe(pa.Table.from_pandas(df_raw.head(), preserve_index=False))
 
-df = clean_numeric(df_raw)
+df = cached_clean_numeric(df_raw)
 
 numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
 if not numeric_cols:
@@ -113,8 +117,118 @@ if not feature_cols:
 test_size = st.slider("Test size (fraction)", 0.1, 0.5, 0.2, 0.05)
 random_state = st.number_input("Random seed", value=42)
 
-X = df[feature_cols].copy()
-y = df[target_col].copy()
+# Forest accuracy saturates long before a million rows; cap what RF trains on
+max_train_rows = st.sidebar.slider(
+    "Max Random Forest training rows", 10_000, 1_000_000, 100_000, 10_000
+)
+
+# float32 halves the bytes moved through fit/predict; NA -> NaN for sklearn
+# (copy=False: no second copy when the columns are already float32 NumPy)
+X = df[feature_cols].to_numpy(dtype=np.float32, na_value=np.nan, copy=False)
+y = df[target_col].to_numpy(dtype=np.float32, na_value=np.nan, copy=False)
+assert X.dtype == np.float32
+
+# ======================================================================
+# CACHED SPLIT / FIT (reused across reruns while inputs are unchanged)
+# ======================================================================
+
+_MODELS = {
+    "Linear Regression": LinearRegression,
+    "Ridge Regression": Ridge,
+    "Lasso Regression": Lasso,
+    "Random Forest": RandomForestRegressor,
+    "Histogram Gradient Boosting": HistGradientBoostingRegressor,
+    "Random Forest Classifier": RandomForestClassifier,
+    "Histogram Gradient Boosting Classifier": HistGradientBoostingClassifier,
+}
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def _cap_train_rows(
+    X_train, y_train, max_rows: int, random_state: int, stratify: bool = False
+):
+    """Subsample the training split to max_rows (class-stratified if asked)."""
+    if len(X_train) <= max_rows:
+        return X_train, y_train
+    if stratify:
+        X_sub, _, y_sub, _ = train_test_split(
+            X_train,
+            y_train,
+            train_size=max_rows,
+            random_state=random_state,
+            stratify=y_train,
+        )
+        return X_sub, y_sub
+    rng = np.random.default_rng(random_state)
+    idx = np.sort(rng.choice(len(X_train), size=max_rows, replace=False))
+    if isinstance(y_train, pd.Series):
+        return X_train[idx], y_train.iloc[idx]
+    return X_train[idx], y_train[idx]
+
+
+class _GramRidge:
+    """Ridge (alpha=0: OLS) solved from cached normal equations; predicts like sklearn."""
+
+    def __init__(self, coef: np.ndarray, intercept: float):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef_ + self.intercept_
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def _gram(X_train: np.ndarray, y_train: np.ndarray):
+    """Centered X'X, X'y and the column means, built once per training split."""
+    x_mean = X_train.mean(axis=0, dtype=np.float64)
+    y_mean = float(y_train.mean(dtype=np.float64))
+    Xc = X_train - x_mean.astype(np.float32)
+    yc = y_train - np.float32(y_mean)
+    return Xc.T @ Xc, Xc.T @ yc, x_mean, y_mean
+
+
+def _fit_gram_ridge(X_train: np.ndarray, y_train: np.ndarray, alpha: float) -> _GramRidge:
+    # Each alpha is a p x p solve instead of another pass over all n rows;
+    # the intercept is left unpenalized, as in sklearn
+    XtX, Xty, x_mean, y_mean = _gram(X_train, y_train)
+    A = XtX.astype(np.float64) + alpha * np.eye(len(XtX))
+    # lstsq tolerates the singular X'X of collinear features (alpha=0)
+    coef = np.linalg.lstsq(A, Xty.astype(np.float64), rcond=None)[0]
+    intercept = y_mean - float(x_mean @ coef)
+    return _GramRidge(coef.astype(np.float32), intercept)
+
+
+@st.cache_resource(show_spinner="Training model...", hash_funcs=FRAME_HASH_FUNCS)
+def _fit_model(model_name: str, params: dict, X_train, y_train):
+    """Fit once per (model, hyperparameters, training data); the estimator is shared."""
+    # NaNs go to sklearn, which reports them instead of solving garbage
+    if model_name in ("Linear Regression", "Ridge Regression") and (
+        np.isfinite(X_train).all() and np.isfinite(y_train).all()
+    ):
+        return _fit_gram_ridge(X_train, y_train, params.get("alpha", 0.0))
+    model = _MODELS[model_name](**params)
+    model.fit(X_train, y_train)
+    return model
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def _predict(model_name: str, params: dict, X_train, y_train, X_test) -> np.ndarray:
+    """Test-set predictions of the cached model; repeat clicks skip tree traversal."""
+    model = _fit_model(model_name, params, X_train, y_train)
+    return model.predict(X_test)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def _importances(
+    model_name: str, params: dict, X_train, y_train, feature_cols: tuple
+) -> pd.DataFrame:
+    """Sorted forest importances indexed by feature, ready for st.bar_chart."""
+    model = _fit_model(model_name, params, X_train, y_train)
+    return pd.DataFrame(
+        {"importance": model.feature_importances_},
+        index=pd.Index(feature_cols, name="feature"),
+    ).sort_values("importance", ascending=False)
+
 
 # ======================================================================
 # REGRESSION
@@ -125,39 +239,41 @@ def run_regression():
 
     model_name = st.selectbox(
         "Regression model",
-        ["Linear Regression", "Ridge Regression", "Lasso Regression", "Random Forest"],
+        [
+            "Linear Regression",
+            "Ridge Regression",
+            "Lasso Regression",
+            "Random Forest",
+            "Histogram Gradient Boosting",
+        ],
     )
 
     # Model parameters
+    params = {}
     if model_name in ["Ridge Regression", "Lasso Regression"]:
-        alpha = st.slider("alpha (regularization strength)", 0.0001, 10.0, 1.0)
+        params["alpha"] = st.slider("alpha (regularization strength)", 0.0001, 10.0, 1.0)
     elif model_name == "Random Forest":
-        n_estimators = st.slider("n_estimators", 10, 500, 200)
-        max_depth = st.slider("max_depth", 2, 50, 10)
+        params["n_estimators"] = st.slider("n_estimators", 10, 500, 200)
+        params["max_depth"] = st.slider("max_depth", 2, 50, 10)
+        params["random_state"] = random_state
+        params["n_jobs"] = -1
+    elif model_name == "Histogram Gradient Boosting":
+        # Features binned to <=255 uint8 levels, multi-threaded; much faster on big frames
+        params["max_iter"] = st.slider("max_iter (boosting rounds)", 10, 500, 200)
+        params["max_depth"] = st.slider("max_depth", 2, 50, 10)
+        params["random_state"] = random_state
 
     # Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state
-    )
-
-    # Model selection
-    if model_name == "Linear Regression":
-        model = LinearRegression()
-    elif model_name == "Ridge Regression":
-        model = Ridge(alpha=alpha)
-    elif model_name == "Lasso Regression":
-        model = Lasso(alpha=alpha)
-    else:
-        model = RandomForestRegressor(
-            n_estimators=n_estimators,
-            max_depth=max_depth,
-            random_state=random_state,
-            n_jobs=-1,
+    X_train, X_test, y_train, y_test = cached_split(X, y, test_size, random_state)
+    n_train_total = len(X_train)
+    if model_name == "Random Forest":
+        X_train, y_train = _cap_train_rows(
+            X_train, y_train, max_train_rows, random_state
         )
 
     if st.button("Train Regression Model"):
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
+        st.caption(f"Trained on {len(X_train):,} / {n_train_total:,} rows")
+        y_pred = _predict(model_name, params, X_train, y_train, X_test)
 
         # Metrics (updated RMSE!)
         r2 = r2_score(y_test, y_pred)
@@ -173,20 +289,19 @@ def run_regression():
         # Plot true vs predicted
         st.subheader("True vs Predicted (line plot)")
         chart_df = pd.DataFrame({
-            "y_true": y_test.values,
+            "y_true": y_test,
             "y_pred": y_pred,
         })
         st.line_chart(chart_df)
 
         # Feature importance for Random Forest only
-        if isinstance(model, RandomForestRegressor):
-            importances = pd.DataFrame({
-                "feature": feature_cols,
-                "importance": model.feature_importances_,
-            }).sort_values("importance", ascending=False)
+        if model_name == "Random Forest":
+            importances = _importances(
+                model_name, params, X_train, y_train, tuple(feature_cols)
+            )
 
             st.subheader("Feature Importance (Random Forest)")
-            st.bar_chart(importances.set_index("feature"))
+            st.bar_chart(importances)
 
 
 # ======================================================================
@@ -204,37 +319,46 @@ def run_classification():
             f"Generating {label_col} from target '{target_col}' "
             "using median split: laps < median are fast (1)."
         )
-        df_labeled = add_fast_slow_label(df, target_col, label_col)
+        df_labeled = cached_fast_slow_label(df, target_col, label_col)
     else:
-        df_labeled = df.copy()
+        df_labeled = df  # only read below; no copy needed
 
     y_cls = df_labeled[label_col].astype(int)
 
     # Train/test split
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y_cls,
-        test_size=test_size,
-        random_state=random_state,
-        stratify=y_cls,
+    X_train, X_test, y_train, y_test = cached_split(
+        X, y_cls, test_size, random_state, stratify=True
+    )
+
+    clf_name = st.selectbox(
+        "Classifier",
+        ["Random Forest", "Histogram Gradient Boosting"],
     )
+    model_name = f"{clf_name} Classifier"
 
     # Hyperparameters
-    n_estimators = st.slider("n_estimators", 50, 500, 200)
-    max_depth = st.slider("max_depth", 2, 50, 10)
-    min_samples_leaf = st.slider("min_samples_leaf", 1, 20, 2)
-
-    model = RandomForestClassifier(
-        n_estimators=n_estimators,
-        max_depth=max_depth,
-        min_samples_leaf=min_samples_leaf,
+    if clf_name == "Random Forest":
+        params = {
+            "n_estimators": st.slider("n_estimators", 50, 500, 200),
+            "n_jobs": -1,
+        }
+    else:
+        params = {"max_iter": st.slider("max_iter (boosting rounds)", 50, 500, 200)}
+    params.update(
+        max_depth=st.slider("max_depth", 2, 50, 10),
+        min_samples_leaf=st.slider("min_samples_leaf", 1, 20, 2),
         random_state=random_state,
-        n_jobs=-1,
     )
 
+    n_train_total = len(X_train)
+    if clf_name == "Random Forest":
+        X_train, y_train = _cap_train_rows(
+            X_train, y_train, max_train_rows, random_state, stratify=True
+        )
+
     if st.button("Train Classifier"):
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
+        st.caption(f"Trained on {len(X_train):,} / {n_train_total:,} rows")
+        y_pred = _predict(model_name, params, X_train, y_train, X_test)
 
         # Metrics
         acc = accuracy_score(y_test, y_pred)
@@ -251,15 +375,14 @@ def run_classification():
         st.subheader("Class distribution (y_test)")
         st.bar_chart(y_test.value_counts(normalize=True))
 
-        # Feature importance
-        importances = model.feature_importances_
-        imp_df = pd.DataFrame({
-            "feature": feature_cols,
-            "importance": importances
-        }).sort_values("importance", ascending=False)
+        # Feature importance (Random Forest only)
+        if clf_name == "Random Forest":
+            imp_df = _importances(
+                model_name, params, X_train, y_train, tuple(feature_cols)
+            )
 
-        st.subheader("Feature Importances (Random Forest)")
-        st.bar_chart(imp_df.set_index("feature"))
+            st.subheader("Feature Importances (Random Forest)")
+            st.bar_chart(imp_df)
 
 
 # ======================================================================
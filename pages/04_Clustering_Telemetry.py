@@ -4,11 +4,17 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
-from sklearn.cluster import KMeans
-
-from f1_api import load_sample_barber_telemetry
-from data_utils import clean_numeric
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from utils.ml_cache import (
+    FRAME_HASH_FUNCS,
+    SAMPLE_SOURCE,
+    UPLOAD_SOURCE,
+    cached_clean_numeric,
+    load_telemetry,
+)
 
 st.set_page_config(
     page_title=" Clustering Telemetry — Barber ML Lab",
@@ -28,33 +34,24 @@ st.sidebar.header("Data Source")
 
 data_source = st.sidebar.radio(
     "Choose telemetry data source:",
-    ["Sample Barber CSV", "Upload CSV"],
+    [SAMPLE_SOURCE, UPLOAD_SOURCE],
 )
 uploaded = None
-if data_source == "Upload CSV":
+if data_source == UPLOAD_SOURCE:
     uploaded = st.sidebar.file_uploader("Upload telemetry CSV", type=["csv"])
 
 
-@st.cache_data(show_spinner=True)
-def _load_data(source: str, file) -> pd.DataFrame:
-    if source == "Sample Barber CSV":
-        return load_sample_barber_telemetry()
-    else:
-        if file is None:
-            return pd.DataFrame()
-        return pd.read_csv(file)
-
-
-df_raw = _load_data(data_source, uploaded)
+df_raw = load_telemetry(data_source, uploaded)
 
 if df_raw.empty:
     st.info("Load a dataset via the sidebar to run clustering.")
     st.stop()
 
 st.subheader("Telemetry (preview)")
-st.dataframe(df_raw.head())
+# Arrow-backed head converts to a Table without copying; Streamlit sends it as-is
+st.dataframe(pa.Table.from_pandas(df_raw.head(), preserve_index=False))
 
-df = clean_numeric(df_raw)
+df = cached_clean_numeric(df_raw)
 numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
 if not numeric_cols:
     st.error("No numeric columns found after cleaning.")
@@ -73,17 +70,42 @@ if not feature_cols:
 n_clusters = st.slider("Number of clusters (k)", 2, 10, 4, 1)
 random_state = st.number_input("Random seed", value=42, step=1)
 
-X = df[feature_cols].copy().dropna()
+X = df[feature_cols].dropna()
 if X.empty:
     st.error("No valid rows after dropping NaNs for selected features.")
     st.stop()
 
+
+MINIBATCH_MIN_ROWS = 50_000  # above this, full-batch Lloyd passes get slow
+
+
+@st.cache_resource(show_spinner="Clustering...", hash_funcs=FRAME_HASH_FUNCS)
+def _fit_kmeans(
+    X_np: np.ndarray, n_clusters: int, random_state: int
+) -> KMeans | MiniBatchKMeans:
+    """Fit once per (data, k, seed); reruns reuse the fitted model and labels_."""
+    if len(X_np) > MINIBATCH_MIN_ROWS:
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=4096,
+            n_init=3,
+            random_state=random_state,
+        )
+    else:
+        model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init="auto")
+    model.fit(X_np)
+    return model
+
+
 if st.button("Run KMeans clustering"):
-    model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init="auto")
-    labels = model.fit_predict(X)
+    # float32 halves the bytes KMeans streams through each Lloyd iteration
+    X_np = X.to_numpy(dtype=np.float32, copy=False)
+    assert X_np.dtype == np.float32
+    model = _fit_kmeans(X_np, n_clusters, random_state)
+    labels = model.labels_
 
-    df_clustered = X.copy()
-    df_clustered["cluster"] = labels
+    # assign adds the label column without copying the feature columns
+    df_clustered = X.assign(cluster=labels)
 
     st.subheader("Cluster counts")
     st.bar_chart(df_clustered["cluster"].value_counts().sort_index())
@@ -98,7 +120,7 @@ if st.button("Run KMeans clustering"):
         x_col = feature_cols[0]
         y_col = feature_cols[1]
         st.write(f"Scatter of **{x_col}** vs **{y_col}** colored by cluster.")
-        proj_df = df_clustered[[x_col, y_col, "cluster"]].copy()
+        proj_df = df_clustered[[x_col, y_col, "cluster"]]
         st.scatter_chart(proj_df, x=x_col, y=y_col, color="cluster")
     else:
         st.info("Select at least two features to see a 2D scatter plot.")
@@ -1,5 +1,6 @@
 # pages/05_Gazoo_AI_Race_Engineer.py
 
+import numpy as np
 import streamlit as st
 from utils import styling, loader, ai_engine
 
@@ -82,9 +83,15 @@ if "last_summary_df" in st.session_state:
     )
 
 def generate_engineer_report(lap_times, sector_scores, recommendation, fatigue_index, confidence):
-    best_lap = min(lap_times)
-    best_lap_number = lap_times.index(best_lap) + 1
-    best_sector = max(sector_scores, key=sector_scores.get)
+    # Single argmin/argmax reductions; ties resolve to the first, as before
+    laps = np.asarray(lap_times, dtype=np.float64)
+    best_idx = int(laps.argmin())
+    best_lap = float(laps[best_idx])
+    best_lap_number = best_idx + 1
+
+    sectors = list(sector_scores)
+    scores = np.fromiter(sector_scores.values(), dtype=np.float64, count=len(sectors))
+    best_sector = sectors[int(scores.argmax())]
 
     report = f"""
 
@@ -143,23 +150,49 @@ st.markdown("### Optional: Radio-Style Text Chat (no audio)")
 
 if "radio_history" not in st.session_state:
     st.session_state["radio_history"] = []
+if "radio_queue" not in st.session_state:
+    st.session_state["radio_queue"] = []
+
+
+def _queue_radio():
+    # Callback, so the input can be cleared before the widget is redrawn
+    text = st.session_state["radio_input"].strip()
+    if text:
+        st.session_state["radio_queue"].append(text)
+    st.session_state["radio_input"] = ""
+
 
 radio_input = st.text_input(
     "Radio to engineer:",
     placeholder="Example: How's my consistency between Lap 1 and Lap 3?",
+    key="radio_input",
 )
 
 col1, col2 = st.columns([1, 3])
 with col1:
     send_radio = st.button("Send Radio", use_container_width=True)
+with col2:
+    st.button("Queue message", on_click=_queue_radio)
+
+radio_queue = st.session_state["radio_queue"]
+if radio_queue:
+    st.caption(
+        "Queued (sent together with Send Radio): "
+        + " · ".join(f"{i}. {m}" for i, m in enumerate(radio_queue, 1))
+    )
 
-if send_radio and radio_input.strip():
+if send_radio and (radio_input.strip() or radio_queue):
     # Use the last summary (if exists) for context
     summary_df = st.session_state.get("last_summary_df")
+    # One message per submit; explicitly queued messages go out together
+    # in one batched Gemini call
+    messages = radio_queue + ([radio_input.strip()] if radio_input.strip() else [])
     try:
-        reply = ai_engine.engineer_reply(radio_input, summary_df=summary_df)
-        st.session_state["radio_history"].append(("Driver", radio_input))
-        st.session_state["radio_history"].append(("Engineer", reply))
+        replies = ai_engine.engineer_replies(messages, summary_df=summary_df)
+        for message, reply in zip(messages, replies):
+            st.session_state["radio_history"].append(("Driver", message))
+            st.session_state["radio_history"].append(("Engineer", reply))
+        st.session_state["radio_queue"] = []
     except Exception as e:
         st.error(f"Radio mode error: {e}")
 
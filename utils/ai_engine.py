@@ -1,10 +1,16 @@
 # utils/ai_engine.py
 
+import hashlib
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import streamlit as st
 import google.generativeai as genai
 
+from utils.kernels import NUMBA_AVAILABLE, lap_channel_stats
+
 # ----------------------------------------------------------------------
 # GOOGLE AI / GEMINI CONFIG (UPDATED FOR NEW SDK)
 # ----------------------------------------------------------------------
@@ -44,6 +50,9 @@ def compute_metrics(df: pd.DataFrame) -> pd.DataFrame:
 
     # --- WIDE FORMAT ----------------------------------------------------------
     if wide_cols.issubset(df.columns):
+        if NUMBA_AVAILABLE:
+            return _finish_summary(_wide_metrics_jit(df, lap_col))
+
         g = df.groupby(lap_col)
         summary = g.agg(
             avg_speed=("speed", "mean"),
@@ -51,32 +60,44 @@ def compute_metrics(df: pd.DataFrame) -> pd.DataFrame:
             avg_brake=("pbrake_f", "mean"),
             var_speed=("speed", "var"),
         ).reset_index()
-        return summary.round(2)
+        return _finish_summary(summary)
 
     # --- LONG FORMAT (barber_sample style) -----------------------------------
     if {"telemetry_name", "telemetry_value"}.issubset(df.columns):
         name_col = "telemetry_name"
         value_col = "telemetry_value"
 
-        def agg_metric(name: str, agg: str):
-            sub = df[df[name_col] == name]
-            if sub.empty:
-                return pd.Series(dtype=float)
-            return sub.groupby(lap_col)[value_col].agg(agg)
-
-        speed_mean = agg_metric("speed", "mean")
-        speed_var = agg_metric("speed", "var")
-        throttle_mean = agg_metric("aps", "mean")
-        brake_mean = agg_metric("pbrake_f", "mean")
-
-        summary = pd.DataFrame({lap_col: sorted(df[lap_col].dropna().unique())})
+        # One groupby over (lap, channel) yields every mean/var at once;
+        # reindexing keeps laps/channels with no samples as NaN
+        metrics = {
+            ("mean", "speed"): "avg_speed",
+            ("mean", "aps"): "avg_throttle",
+            ("mean", "pbrake_f"): "avg_brake",
+            ("var", "speed"): "var_speed",
+        }
+        channels = ["speed", "aps", "pbrake_f"]
+
+        # Keep only the hot channels and columns, and group on small
+        # categorical codes instead of hashing channel strings
+        hot = df.loc[df[name_col].isin(channels), [lap_col, name_col, value_col]]
+        hot = hot.assign(
+            **{name_col: pd.Categorical(hot[name_col], categories=channels)}
+        )
+        stats = (
+            hot
+            .groupby([lap_col, name_col], observed=True)[value_col]
+            .agg(["mean", "var"])
+            .unstack(name_col)
+        )
 
-        summary = summary.merge(speed_mean.rename("avg_speed"), on=lap_col, how="left")
-        summary = summary.merge(throttle_mean.rename("avg_throttle"), on=lap_col, how="left")
-        summary = summary.merge(brake_mean.rename("avg_brake"), on=lap_col, how="left")
-        summary = summary.merge(speed_var.rename("var_speed"), on=lap_col, how="left")
+        laps = pd.Index(sorted(df[lap_col].dropna().unique()), name=lap_col)
+        summary = stats.reindex(
+            index=laps, columns=pd.MultiIndex.from_tuples(list(metrics))
+        )
+        summary.columns = list(metrics.values())
+        summary = summary.reset_index()
 
-        return summary.round(2)
+        return _finish_summary(summary)
 
     raise ValueError(
         "Telemetry must be either:\n"
@@ -85,6 +106,109 @@ def compute_metrics(df: pd.DataFrame) -> pd.DataFrame:
     )
 
 
+SUMMARY_METRICS = ["avg_speed", "avg_throttle", "avg_brake", "var_speed"]
+
+
+def _finish_summary(summary: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop laps with no metric at all and round to float32.
+
+    Sparse long-format channels leave all-NaN rows that only pad the prompt;
+    float32 keeps the frame small and its CSV text short.
+    """
+    summary = summary.dropna(subset=SUMMARY_METRICS, how="all")
+    return summary.round(2).astype({m: "float32" for m in SUMMARY_METRICS})
+
+
+def _channel(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan
+    )
+
+
+def _wide_metrics_jit(df: pd.DataFrame, lap_col: str) -> pd.DataFrame:
+    """Wide-format lap summary from one fused Numba pass over the samples."""
+    # sort=True orders laps like groupby; missing laps get code -1 and are skipped
+    codes, laps = pd.factorize(df[lap_col], sort=True)
+    avg_speed, avg_throttle, avg_brake, var_speed = lap_channel_stats(
+        codes.astype(np.int64),
+        len(laps),
+        _channel(df, "speed"),
+        _channel(df, "aps"),
+        _channel(df, "pbrake_f"),
+    )
+    return pd.DataFrame({
+        lap_col: laps,
+        "avg_speed": avg_speed,
+        "avg_throttle": avg_throttle,
+        "avg_brake": avg_brake,
+        "var_speed": var_speed,
+    })
+
+
+# ----------------------------------------------------------------------
+# CACHED GEMINI CALL
+# ----------------------------------------------------------------------
+
+# Stable persona/format instructions go in system_instruction, ahead of the
+# per-call content; Gemini's implicit prefix caching can then reuse them across
+# calls, and each request carries only the telemetry summary and question.
+# (Explicit CachedContent needs a prefix of >= 1k tokens; these are far shorter.)
+RACE_ENGINEER_INSTRUCTION = """
+You are a calm, precise British motorsport race engineer.
+Give direct, actionable driving feedback using ONLY the telemetry summary provided.
+
+Provide:
+- Key weaknesses
+- Lap-by-lap comparison
+- Actionable improvement steps
+- No disclaimers, no apologies
+"""
+
+RADIO_INSTRUCTION = """
+You are a calm British motorsport race engineer.
+Reply like you're on team radio. Short, direct, no fluff.
+Respond in at most 2–3 short sentences.
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def _gemini_model(model_name: str, system_instruction: str):
+    """One GenerativeModel per (model, instructions), shared across calls."""
+    return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _gemini_call(
+    prompt: str, system_instruction: str, model_name: str = TEXT_MODEL
+) -> str:
+    """
+    Send one prompt to Gemini, cached on the prompt text for an hour.
+
+    Streamlit reruns the page on every widget change; an unchanged summary and
+    question then reuse the previous answer instead of another API round trip.
+    """
+    model = _gemini_model(model_name, system_instruction)
+    return model.generate_content(prompt).text
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def gemini_many(
+    prompts: tuple[str, ...], system_instruction: str, model_name: str = TEXT_MODEL
+) -> list[str]:
+    """
+    Send several prompts concurrently and return the replies in order.
+
+    The requests overlap their network waits, so wall time is roughly that of
+    the slowest call rather than the sum. Cached like _gemini_call.
+    """
+    model = _gemini_model(model_name, system_instruction)
+    # Threads rather than generate_content_async + asyncio.run: the SDK's async
+    # client stays bound to the first event loop, and each call would make a new one
+    with ThreadPoolExecutor(max_workers=len(prompts) or 1) as pool:
+        return list(pool.map(lambda p: model.generate_content(p).text, prompts))
+
+
 # ----------------------------------------------------------------------
 # MAIN LAP-BY-LAP GEMINI RACE ENGINEER
 # ----------------------------------------------------------------------
@@ -96,53 +220,146 @@ def gemini_race_engineer(df: pd.DataFrame, user_question: str):
         user_question = "Give me a lap-by-lap coaching summary and where I'm losing time."
 
     prompt = f"""
-You are a calm, precise British motorsport race engineer.
-Give direct, actionable driving feedback using ONLY the telemetry summary below.
-
-Telemetry Summary (per lap):
-{summary.to_markdown(index=False)}
+Telemetry Summary (per lap, CSV):
+{_summary_csv(summary)}
 
 Driver Question:
 {user_question}
-
-Provide:
-- Key weaknesses
-- Lap-by-lap comparison
-- Actionable improvement steps
-- No disclaimers, no apologies
 """
 
-    model = genai.GenerativeModel(TEXT_MODEL)
-    response = model.generate_content(prompt)
-
-    return response.text, summary
+    return _gemini_call(prompt, RACE_ENGINEER_INSTRUCTION), summary
 
 
 # ----------------------------------------------------------------------
 # SHORT RADIO-STYLE GEMINI REPLY
 # ----------------------------------------------------------------------
 
-def engineer_reply(user_text: str, summary_df: pd.DataFrame | None = None) -> str:
-    telemetry_part = ""
-    if summary_df is not None and not summary_df.empty:
-        telemetry_part = (
-            f"\nTelemetry Summary (per lap):\n"
-            f"{summary_df.to_markdown(index=False)}\n"
-        )
+_SUMMARY_CSV_CACHE: dict[str, str] = {}
+_SUMMARY_CSV_MAX = 16
 
-    prompt = f"""
-You are a calm British motorsport race engineer.
-Reply like you're on team radio. Short, direct, no fluff.
 
+def _summary_csv(summary_df: pd.DataFrame) -> str:
+    """
+    CSV text of a lap summary, memoized on a content hash.
+
+    Every radio message and rerun re-sends the same summary; hashing its
+    values is a vectorized pass, while to_csv formats each cell in Python.
+    (st.cache_data's pickling overhead costs more than the format here.)
+    """
+    h = hashlib.md5(repr(list(summary_df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(summary_df, index=True).to_numpy().tobytes())
+    key = h.hexdigest()
+    csv = _SUMMARY_CSV_CACHE.get(key)
+    if csv is None:
+        if len(_SUMMARY_CSV_CACHE) >= _SUMMARY_CSV_MAX:
+            _SUMMARY_CSV_CACHE.clear()
+        csv = _SUMMARY_CSV_CACHE[key] = summary_df.to_csv(index=False)
+    return csv
+
+
+def _telemetry_context(summary_df: pd.DataFrame | None) -> str:
+    if summary_df is None or summary_df.empty:
+        return ""
+    return f"\nTelemetry Summary (per lap, CSV):\n{_summary_csv(summary_df)}"
+
+
+def _radio_prompt(user_text: str, telemetry_part: str) -> str:
+    return f"""
 {telemetry_part}
 
 Driver radio:
 "{user_text}"
 
-Engineer, respond in at most 2–3 short sentences:
+Engineer:
 """
 
-    model = genai.GenerativeModel(TEXT_MODEL)
-    reply = model.generate_content(prompt)
 
-    return reply.text
+def engineer_reply(user_text: str, summary_df: pd.DataFrame | None = None) -> str:
+    telemetry_part = _telemetry_context(summary_df)
+    return _gemini_call(_radio_prompt(user_text, telemetry_part), RADIO_INSTRUCTION)
+
+
+# ----------------------------------------------------------------------
+# BATCHED RADIO REPLIES
+# ----------------------------------------------------------------------
+
+# Several radio messages against the same summary go out as one numbered
+# prompt: one network round trip and one copy of the telemetry table instead
+# of one per message.
+BATCH_ENABLED = True
+MAX_BATCH_MESSAGES = 8
+
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+
+
+def _split_numbered(text: str, n: int) -> list[str] | None:
+    """
+    Split a '1. ... 2. ...' answer into n replies, or None if it doesn't split cleanly.
+
+    Only the next expected number starts a new reply; any other numbered line
+    (e.g. a list inside one answer) is kept as text of the current reply.
+    Returns None unless exactly 1..n were found (no n+1), each non-empty.
+    """
+    replies: list[list[str]] = []
+    for line in text.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match and int(match.group(1)) == len(replies) + 1:
+            if len(replies) == n:
+                return None  # more numbered replies than messages
+            replies.append([match.group(2)])
+        elif replies and line.strip():
+            replies[-1].append(line.strip())
+    joined = [" ".join(r).strip() for r in replies]
+    if len(joined) != n or not all(joined):
+        return None
+    return joined
+
+
+def engineer_replies(
+    messages: list[str], summary_df: pd.DataFrame | None = None
+) -> list[str]:
+    """
+    Radio replies for several driver messages, batched up to MAX_BATCH_MESSAGES
+    per Gemini call. A batch whose answer doesn't split into exactly one reply
+    per message is re-asked message by message. Batches, and retries, are
+    sent concurrently.
+    """
+    messages = [m.strip() for m in messages if m.strip()]
+    telemetry_part = _telemetry_context(summary_df)
+    if len(messages) <= 1:
+        return [engineer_reply(m, summary_df) for m in messages]
+    if not BATCH_ENABLED:
+        prompts = tuple(_radio_prompt(m, telemetry_part) for m in messages)
+        return gemini_many(prompts, RADIO_INSTRUCTION)
+
+    batches = [
+        messages[start:start + MAX_BATCH_MESSAGES]
+        for start in range(0, len(messages), MAX_BATCH_MESSAGES)
+    ]
+    prompts = []
+    for batch in batches:
+        numbered = "\n".join(f'{i}. "{m}"' for i, m in enumerate(batch, 1))
+        prompts.append(f"""
+{telemetry_part}
+
+Driver radio messages:
+{numbered}
+
+Engineer, answer each message separately, numbered to match (1., 2., ...).
+Do not use numbered lists inside an answer.
+""")
+
+    replies: list[str | None] = []
+    for batch, answer in zip(batches, gemini_many(tuple(prompts), RADIO_INSTRUCTION)):
+        # A mis-numbered answer can't be attributed safely: retry the whole batch
+        replies.extend(_split_numbered(answer, len(batch)) or [None] * len(batch))
+
+    missing = [i for i, reply in enumerate(replies) if not reply]
+    if missing:
+        retry = gemini_many(
+            tuple(_radio_prompt(messages[i], telemetry_part) for i in missing),
+            RADIO_INSTRUCTION,
+        )
+        for i, reply in zip(missing, retry):
+            replies[i] = reply
+    return replies
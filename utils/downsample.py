@@ -0,0 +1,56 @@
+# utils/downsample.py
+"""
+Visual downsampling for line charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the points that carry the shape
+of a series (peaks, dips, corners) so a few thousand points per trace look
+the same as the full telemetry at chart resolution.
+"""
+
+import numpy as np
+
+MAX_LINE_POINTS = 20_000  # total points per figure sent to the browser
+
+
+def _nanmean(values: np.ndarray, fallback: float) -> float:
+    """Mean of the non-NaN values, or fallback if there are none."""
+    finite = values[~np.isnan(values)]
+    return finite.mean() if finite.size else fallback
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the n_out points LTTB keeps from (x, y); x must be sorted.
+
+    First and last points are always kept. Returns all indices when the
+    series is already short enough.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    every = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Average of the next bucket is the third triangle vertex; NaN samples
+        # are skipped, and an all-NaN bucket falls back to the last point
+        avg_x = _nanmean(x[end:next_end], x[-1])
+        avg_y = _nanmean(y[end:next_end], y[-1])
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        # NaN samples never win a bucket unless the whole bucket is NaN
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        idx[i + 1] = a
+
+    return idx
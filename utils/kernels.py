@@ -0,0 +1,159 @@
+# utils/kernels.py
+"""
+Small numeric kernels for the telemetry pages, JIT-compiled with Numba.
+
+Numba is optional: without it the same functions run as plain Python loops,
+which is fine for lap-level arrays (hundreds of rows).
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+NAT_NS = np.iinfo(np.int64).min
+
+
+def to_epoch_ns(series: pd.Series) -> np.ndarray:
+    """Datetime series (NumPy or Arrow backed, any resolution) -> int64 ns; NaT -> NAT_NS."""
+    return series.to_numpy(
+        dtype="datetime64[ns]", na_value=np.datetime64("NaT")
+    ).view("int64")
+
+
+@njit(cache=True)
+def lap_duration_mask(start_ns, end_ns, min_s, max_s):
+    """
+    Lap durations in seconds and a keep-mask for min_s <= duration < max_s.
+
+    Laps with a missing start/end get a NaN duration and are never kept.
+    """
+    n = start_ns.shape[0]
+    dur = np.empty(n, np.float64)
+    keep = np.empty(n, np.bool_)
+    for i in range(n):
+        s = start_ns[i]
+        e = end_ns[i]
+        if s == NAT_NS or e == NAT_NS:
+            dur[i] = np.nan
+            keep[i] = False
+        else:
+            d = (e - s) / 1e9
+            dur[i] = d
+            keep[i] = d >= min_s and d < max_s and e > s
+    return dur, keep
+
+
+@njit(cache=True)
+def zscore_array(a):
+    """NaN-aware z-score with sample std (ddof=1); zero/undefined spread -> zeros."""
+    n = 0
+    total = 0.0
+    for v in a:
+        if not np.isnan(v):
+            n += 1
+            total += v
+    out = np.zeros(a.shape[0], np.float64)
+    if n < 2:
+        return out
+    m = total / n
+    ss = 0.0
+    for v in a:
+        if not np.isnan(v):
+            ss += (v - m) * (v - m)
+    s = np.sqrt(ss / (n - 1))
+    if not s > 0:
+        return out
+    for i in range(a.shape[0]):
+        out[i] = (a[i] - m) / s
+    return out
+
+
+@njit(cache=True)
+def lap_channel_stats(codes, n_laps, speed, throttle, brake):
+    """
+    Per-lap mean speed/throttle/brake and sample variance of speed, in one pass.
+
+    codes are lap ids in [0, n_laps); negative codes (missing lap) are skipped,
+    as are NaN samples per channel. Speed variance uses Welford's update.
+    Laps without samples get NaN; fewer than two speed samples -> NaN variance.
+    """
+    n_speed = np.zeros(n_laps, np.int64)
+    n_thr = np.zeros(n_laps, np.int64)
+    n_brk = np.zeros(n_laps, np.int64)
+    mean_speed = np.zeros(n_laps, np.float64)
+    m2_speed = np.zeros(n_laps, np.float64)
+    sum_thr = np.zeros(n_laps, np.float64)
+    sum_brk = np.zeros(n_laps, np.float64)
+
+    for i in range(codes.shape[0]):
+        g = codes[i]
+        if g < 0:
+            continue
+        v = speed[i]
+        if not np.isnan(v):
+            n_speed[g] += 1
+            delta = v - mean_speed[g]
+            mean_speed[g] += delta / n_speed[g]
+            m2_speed[g] += delta * (v - mean_speed[g])
+        v = throttle[i]
+        if not np.isnan(v):
+            n_thr[g] += 1
+            sum_thr[g] += v
+        v = brake[i]
+        if not np.isnan(v):
+            n_brk[g] += 1
+            sum_brk[g] += v
+
+    var_speed = np.full(n_laps, np.nan)
+    mean_thr = np.full(n_laps, np.nan)
+    mean_brk = np.full(n_laps, np.nan)
+    for g in range(n_laps):
+        if n_speed[g] == 0:
+            mean_speed[g] = np.nan
+        elif n_speed[g] > 1:
+            var_speed[g] = m2_speed[g] / (n_speed[g] - 1)
+        if n_thr[g] > 0:
+            mean_thr[g] = sum_thr[g] / n_thr[g]
+        if n_brk[g] > 0:
+            mean_brk[g] = sum_brk[g] / n_brk[g]
+    return mean_speed, mean_thr, mean_brk, var_speed
+
+
+@njit(cache=True, parallel=True)
+def ffill_bfill_inplace(a):
+    """
+    Forward-fill then back-fill NaNs down each column of a 2-D float array.
+
+    Same result as DataFrame.ffill().bfill(): one forward sweep per column,
+    then only the leading gap is back-filled. Columns run in parallel;
+    modifies `a` in place.
+    """
+    n_rows, n_cols = a.shape
+    for j in prange(n_cols):
+        last = np.nan
+        for i in range(n_rows):
+            if np.isnan(a[i, j]):
+                a[i, j] = last
+            else:
+                last = a[i, j]
+        # Only the leading gap can still be NaN after the forward sweep
+        first = np.nan
+        for i in range(n_rows):
+            if not np.isnan(a[i, j]):
+                first = a[i, j]
+                break
+        for i in range(n_rows):
+            if not np.isnan(a[i, j]):
+                break
+            a[i, j] = first
@@ -1,8 +1,12 @@
 # utils/loader.py
+import hashlib
 import os
 import streamlit as st
 import pandas as pd
 import numpy as np
+from streamlit.runtime.uploaded_file_manager import UploadedFile
+
+from utils.kernels import NUMBA_AVAILABLE, ffill_bfill_inplace
 
 ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
 BARBER_DIR = os.path.join(ROOT_DIR, "barber")
@@ -29,26 +33,99 @@ def pivot_trd_long_to_wide(df: pd.DataFrame) -> pd.DataFrame:
 
     # try to parse timestamp if present
     if "timestamp" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-
-    wide = df.pivot_table(
-        index=idx_cols,
-        columns="telemetry_name",
-        values="telemetry_value",
-        aggfunc="mean",
-    ).reset_index()
+        df["timestamp"] = pd.to_datetime(
+            df["timestamp"], format="ISO8601", errors="coerce", utc=True, cache=True
+        )
+
+    # Same rows pivot_table keeps: complete keys with a value
+    keys = idx_cols + ["telemetry_name"]
+    long = df[keys + ["telemetry_value"]].dropna()
+
+    # Scatter values straight into the (row, channel) grid instead of going
+    # through pivot_table's aggregation + unstack. bincount sums and counts per
+    # cell in one pass each, so duplicate keys average exactly like
+    # aggfunc="mean", and unique keys need no separate code path.
+    groups = long.groupby(idx_cols, sort=True)
+    rows = groups.ngroup().to_numpy()
+    row_labels = groups.size().index
+    channels, channel_labels = pd.factorize(long["telemetry_name"], sort=True)
+
+    n_channels = len(channel_labels)
+    cells = rows * n_channels + channels
+    n_cells = len(row_labels) * n_channels
+    values = long["telemetry_value"].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        means = (
+            np.bincount(cells, weights=values, minlength=n_cells)
+            / np.bincount(cells, minlength=n_cells)
+        )
+
+    wide = pd.concat(
+        [
+            row_labels.to_frame(index=False),
+            pd.DataFrame(
+                means.reshape(len(row_labels), n_channels), columns=channel_labels
+            ),
+        ],
+        axis=1,
+    )
 
     wide.columns.name = None
     wide.columns = [str(c) for c in wide.columns]
     return wide
 
 
-@st.cache_data(show_spinner=True)
+# The only columns the long -> wide pivot reads from a TRD long-format file
+LONG_FORMAT_COLS = ["lap", "timestamp", "telemetry_name", "telemetry_value"]
+LONG_FORMAT_DTYPES = {"telemetry_name": "category", "telemetry_value": "float32"}
+
+
+def _read_telemetry_csv(source) -> pd.DataFrame:
+    """
+    pyarrow-engine CSV read. Long-format files are pruned to the pivot's
+    columns (TRD exports carry many unused metadata columns); anything else
+    is read in full.
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+    if {"telemetry_name", "telemetry_value"}.issubset(header):
+        usecols = [c for c in LONG_FORMAT_COLS if c in header]
+        try:
+            return pd.read_csv(
+                source,
+                engine="pyarrow",
+                dtype_backend="pyarrow",
+                usecols=usecols,
+                dtype=LONG_FORMAT_DTYPES,
+            )
+        except ValueError:
+            # e.g. non-numeric telemetry_value: let pyarrow infer instead
+            if hasattr(source, "seek"):
+                source.seek(0)
+            return pd.read_csv(
+                source, engine="pyarrow", dtype_backend="pyarrow", usecols=usecols
+            )
+
+    return pd.read_csv(source, engine="pyarrow", dtype_backend="pyarrow")
+
+
+def _upload_hash(f: UploadedFile) -> str:
+    # Content key: each rerun hands back a new UploadedFile for the same upload
+    return hashlib.sha1(f.getvalue()).hexdigest()
+
+
+@st.cache_data(
+    show_spinner=True,
+    hash_funcs={UploadedFile: _upload_hash},
+    max_entries=4,  # pivoted full-race frames are large; keep only a few
+)
 def load_and_pivot_any(local_path: str | None, uploaded_file):
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        df = _read_telemetry_csv(uploaded_file)
     elif local_path is not None:
-        df = pd.read_csv(local_path)
+        df = _read_telemetry_csv(local_path)
     else:
         st.stop()
 
@@ -57,12 +134,10 @@ def load_and_pivot_any(local_path: str | None, uploaded_file):
 
 
 def guess_columns(df: pd.DataFrame):
-    cols = list(df.columns)
+    colset = set(df.columns)
+
     def pick(candidates):
-        for c in candidates:
-            if c in cols:
-                return c
-        return None
+        return next((c for c in candidates if c in colset), None)
 
     mapping = {
         "speed_col": pick(["VBOX_Speed", "Speed", "speed"]),
@@ -108,6 +183,16 @@ def sidebar_data_selector():
     return df
 
 
+def _ffill_bfill(frame: pd.DataFrame) -> pd.DataFrame:
+    """frame.ffill().bfill(), as one Numba sweep per direction when available."""
+    if not NUMBA_AVAILABLE or frame.empty:
+        return frame.ffill().bfill()
+    # Fresh float64 copy, so filling in place never touches the caller's data
+    arr = frame.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+    ffill_bfill_inplace(arr)
+    return pd.DataFrame(arr, index=frame.index, columns=frame.columns)
+
+
 def build_ml_matrices(df, target_col, drop_cols=None):
     if drop_cols is None:
         drop_cols = []
@@ -116,10 +201,10 @@ def build_ml_matrices(df, target_col, drop_cols=None):
     feature_cols = [c for c in numeric_df.columns if c not in drop_cols + [target_col]]
 
     X = numeric_df[feature_cols].replace([np.inf, -np.inf], np.nan)
-    X = X.fillna(method="ffill").fillna(method="bfill")
+    X = _ffill_bfill(X)
 
     y = df[target_col].replace([np.inf, -np.inf], np.nan)
-    y = y.fillna(method="ffill").fillna(method="bfill")
+    y = _ffill_bfill(y.to_frame())[target_col]
 
     valid = y.notna()
     X = X.loc[valid]
@@ -0,0 +1,116 @@
+# utils/ml_cache.py
+"""
+Cached data preparation shared by the ML pages (03 regression/classification,
+04 clustering).
+
+Streamlit keys st.cache_data/st.cache_resource by the defining function, so a
+helper defined once here is one cache for every page: switching pages with
+the same dataset reuses the loaded, cleaned frame instead of rebuilding it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from sklearn.model_selection import train_test_split
+
+try:
+    import xxhash
+except ImportError:  # optional; blake2b is the stdlib fallback
+    xxhash = None
+
+from f1_api import load_sample_barber_telemetry, load_uploaded_telemetry
+from data_utils import add_fast_slow_label, clean_numeric
+
+SAMPLE_SOURCE = "Sample Barber CSV"
+UPLOAD_SOURCE = "Upload CSV"
+
+
+def _column_buffers(col: pd.Series):
+    """Byte buffers that identify a column's values, without per-row work."""
+    dtype = col.dtype
+    if isinstance(dtype, pd.ArrowDtype) and not pa.types.is_dictionary(dtype.pyarrow_dtype):
+        # Validity/offset/data buffers as they sit in memory; offset and length
+        # pin down which slice of them the column covers
+        arr = col.array.__arrow_array__()
+        for chunk in arr.chunks if isinstance(arr, pa.ChunkedArray) else [arr]:
+            yield repr((chunk.offset, len(chunk))).encode()
+            yield from (buf for buf in chunk.buffers() if buf is not None)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        yield np.ascontiguousarray(col.to_numpy()).view(np.uint8)
+    else:
+        # object/categorical/masked columns: pandas' row hashing
+        yield pd.util.hash_pandas_object(col, index=False).to_numpy()
+
+
+def _hasher():
+    return xxhash.xxh3_64() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def frame_hash(obj: pd.DataFrame | pd.Series) -> str:
+    """
+    Full content hash of a frame or series (Streamlit's default samples rows).
+
+    Shape, column names and dtypes go into the key; column values are hashed
+    from their memory buffers with xxh3 (or blake2b) rather than row by row.
+    """
+    frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+    h = _hasher()
+    h.update(repr((frame.shape, list(frame.columns), list(map(str, frame.dtypes)))).encode())
+    if isinstance(frame.index, pd.RangeIndex):
+        h.update(repr(frame.index).encode())
+    else:
+        h.update(pd.util.hash_pandas_object(frame.index).values.tobytes())
+    for _, col in frame.items():
+        for buf in _column_buffers(col):
+            h.update(buf)
+    return h.hexdigest()
+
+
+def array_hash(a: np.ndarray) -> str:
+    """Full content hash of an array (Streamlit's default samples large ones)."""
+    h = _hasher()
+    h.update(repr((a.shape, a.dtype.str)).encode())
+    if a.dtype.hasobject:
+        h.update(pd.util.hash_array(a.ravel()).tobytes())
+    else:
+        h.update(np.ascontiguousarray(a).view(np.uint8))
+    return h.hexdigest()
+
+
+# For the cached ML helpers: frames, series and the NumPy X/y built from them
+FRAME_HASH_FUNCS = {pd.DataFrame: frame_hash, pd.Series: frame_hash, np.ndarray: array_hash}
+
+
+def load_telemetry(source: str, file) -> pd.DataFrame:
+    """Route the sidebar choice to the cached loaders; empty frame if nothing is uploaded."""
+    if source == SAMPLE_SOURCE:
+        return load_sample_barber_telemetry()
+    if file is None:
+        return pd.DataFrame()
+    return load_uploaded_telemetry(file.getvalue())
+
+
+# data_utils stays framework-agnostic; the caching is added here
+cached_clean_numeric = st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)(
+    clean_numeric
+)
+cached_fast_slow_label = st.cache_data(
+    show_spinner=False, hash_funcs=FRAME_HASH_FUNCS
+)(add_fast_slow_label)
+
+
+@st.cache_data(show_spinner=False, hash_funcs=FRAME_HASH_FUNCS)
+def cached_split(X, y, test_size: float, random_state: int, stratify: bool = False):
+    """train_test_split, cached on the data and split settings."""
+    return train_test_split(
+        X,
+        y,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y if stratify else None,
+    )
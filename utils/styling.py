@@ -1,4 +1,6 @@
 # utils/styling.py
+import re
+
 import streamlit as st
 
 def set_page_config():
@@ -7,9 +9,21 @@ def set_page_config():
         layout="wide",
     )
 
-def inject_base_css():
-    st.markdown(
-        """
+def _minify(markup: str) -> str:
+    """Collapse whitespace so each rerun ships fewer bytes over the websocket."""
+    markup = re.sub(r"\s+", " ", markup)
+    markup = re.sub(r"\s*([{};])\s*", r"\1", markup)
+    return re.sub(r">\s+<", "><", markup).strip()
+
+
+# Built once at import. Streamlit drops any element a rerun doesn't redraw, so
+# these are still emitted every run (a session_state "already injected" flag
+# would leave the page unstyled after the first interaction), but as compact
+# prebuilt strings.
+# The banner, grid-light and track animations play three times and stop
+# rather than looping forever (the resting track-line style is the drawn
+# track), and are skipped for prefers-reduced-motion.
+BASE_CSS = _minify("""
 <style>
 body {
     background-color: #000000 !important;
@@ -79,7 +93,7 @@ div.stButton > button:hover {
     height: 100%;
     background: linear-gradient(120deg, rgba(255,255,255,0.25), transparent);
     transform: skewX(-20deg);
-    animation: bannerSweep 6s infinite;
+    animation: bannerSweep 6s 3;
 }
 @keyframes bannerSweep {
     0%   { left: -40%; opacity: 0; }
@@ -98,11 +112,11 @@ div.stButton > button:hover {
     background: #220000;
     box-shadow: 0 0 4px #000;
 }
-.grid-light:nth-child(1) { animation: lightSeq 3s infinite 0s; }
-.grid-light:nth-child(2) { animation: lightSeq 3s infinite 0.25s; }
-.grid-light:nth-child(3) { animation: lightSeq 3s infinite 0.5s; }
-.grid-light:nth-child(4) { animation: lightSeq 3s infinite 0.75s; }
-.grid-light:nth-child(5) { animation: lightSeq 3s infinite 1.0s; }
+.grid-light:nth-child(1) { animation: lightSeq 3s 3 0s; }
+.grid-light:nth-child(2) { animation: lightSeq 3s 3 0.25s; }
+.grid-light:nth-child(3) { animation: lightSeq 3s 3 0.5s; }
+.grid-light:nth-child(4) { animation: lightSeq 3s 3 0.75s; }
+.grid-light:nth-child(5) { animation: lightSeq 3s 3 1.0s; }
 @keyframes lightSeq {
     0%   { background:#220000; box-shadow:0 0 4px #000; }
     30%  { background:#f44336; box-shadow:0 0 10px #f44336; }
@@ -134,8 +148,8 @@ div.stButton > button:hover {
     stroke-linecap: round;
     filter: drop-shadow(0 0 8px rgba(0,229,255,0.9));
     stroke-dasharray: 1000;
-    stroke-dashoffset: 1000;
-    animation: trackDraw 4.3s infinite ease-in-out;
+    stroke-dashoffset: 0;
+    animation: trackDraw 4.3s 3 ease-in-out;
 }
 @keyframes trackDraw {
     0%   { stroke-dashoffset: 1000; opacity: 0.0; }
@@ -143,14 +157,13 @@ div.stButton > button:hover {
     65%  { stroke-dashoffset: 0;   opacity: 1.0; }
     100% { stroke-dashoffset: 0;   opacity: 0.0; }
 }
+@media (prefers-reduced-motion: reduce) {
+    .track-line, .grid-light, .tgr-banner::after { animation: none !important; }
+}
 </style>
-        """,
-        unsafe_allow_html=True,
-    )
+""")
 
-def render_banner():
-    st.markdown(
-        """
+BANNER_HTML = _minify("""
 <div class="tgr-banner">
   <div>
     <div style="font-size: 1.0rem; text-transform: uppercase; letter-spacing: 0.14em;">
@@ -172,13 +185,9 @@ def render_banner():
   </div>
 </div>
 <div class="section-divider"></div>
-        """,
-        unsafe_allow_html=True,
-    )
+""")
 
-def render_track_card():
-    st.markdown(
-        """
+TRACK_CARD_HTML = _minify("""
 <div class="track-card">
   <div style="font-size:0.85rem; text-transform:uppercase; letter-spacing:0.12em; color:#bbbbbb;">
     Virtual Barber track outline
@@ -198,6 +207,14 @@ def render_track_card():
     Approximate flow of a Barber GP lap, animated to suggest racing line evolution.
   </div>
 </div>
-        """,
-        unsafe_allow_html=True,
-    )
+""")
+
+
+def inject_base_css():
+    st.markdown(BASE_CSS, unsafe_allow_html=True)
+
+def render_banner():
+    st.markdown(BANNER_HTML, unsafe_allow_html=True)
+
+def render_track_card():
+    st.markdown(TRACK_CARD_HTML, unsafe_allow_html=True)
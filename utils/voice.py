@@ -19,11 +19,38 @@ def voice_input_with_waveform():
     let audioContext = null;
     let analyser = null;
     let micSource = null;
-    let animationId = null;
+    let waveformTimer = null;
     let finalTranscript = "";
+    let targetField = null;
+    let writeScheduled = false;
+    // What has been written into the target field: committedLen chars of
+    // final transcript, then interimLen chars of the current interim guess
+    let writtenField = null;
+    let committedLen = 0;
+    let interimLen = 0;
+    let unwrittenFinal = "";
+    let pendingInterim = "";
+    const WAVEFORM_FRAME_MS = 45;  // ~20 fps waveform repaint
+    const RESTART_AFTER_SILENCE_MS = 1500;  // recycle recognition after a finished phrase
+    let restartTimer = null;
+    // Restart delay after no-speech/network errors: doubles per failure, reset by a result
+    const RESTART_BACKOFF_MIN_MS = 100;
+    const RESTART_BACKOFF_MAX_MS = 4000;
+    let restartDelay = 0;
+    const IDLE_SUSPEND_MS = 500;  // after Stop; longer than the end beep
+    // Bar colour per height, built once instead of a new rgb() string per bar per frame
+    const BAR_COLORS = Array.from({ length: 256 }, (_, h) => `rgb(${Math.min(255, h + 50)},40,40)`);
 
-    function playRadioStart() {
-        const ctx = new (window.AudioContext || window.webkitAudioContext)();
+    // One AudioContext for the beeps and the analyser: each context holds its
+    // own audio thread, and Chrome limits how many a page may open
+    function getAudioContext() {
+        audioContext ||= new (window.AudioContext || window.webkitAudioContext)();
+        if (audioContext.state === "suspended") audioContext.resume();
+        return audioContext;
+    }
+
+    // Beep graphs, scheduled on whichever context renders them
+    function radioStartGraph(ctx) {
         const osc = ctx.createOscillator();
         const gain = ctx.createGain();
         osc.type = "sine";
@@ -35,8 +62,7 @@ def voice_input_with_waveform():
         osc.start(); osc.stop(ctx.currentTime + 0.2);
     }
 
-    function playRadioEnd() {
-        const ctx = new (window.AudioContext || window.webkitAudioContext)();
+    function radioEndGraph(ctx) {
         const osc = ctx.createOscillator();
         const gain = ctx.createGain();
         osc.type = "sawtooth";
@@ -48,46 +74,208 @@ def voice_input_with_waveform():
         osc.start(); osc.stop(ctx.currentTime + 0.28);
     }
 
+    // Each beep is rendered offline once into an AudioBuffer; a click then
+    // just starts a buffer source instead of building and scheduling a graph
+    let beepBuffers = null;
+
+    function renderBeep(graph, seconds) {
+        const rate = getAudioContext().sampleRate;
+        const offline = new OfflineAudioContext(1, Math.ceil(rate * seconds), rate);
+        graph(offline);
+        return offline.startRendering();
+    }
+
+    function playBeep(which) {
+        const ctx = getAudioContext();
+        beepBuffers ||= Promise.all([
+            renderBeep(radioStartGraph, 0.2),
+            renderBeep(radioEndGraph, 0.28),
+        ]);
+        beepBuffers.then(([start, end]) => {
+            const src = ctx.createBufferSource();
+            src.buffer = which === "start" ? start : end;
+            src.connect(ctx.destination);
+            src.start();
+        });
+    }
+
+    function playRadioStart() {
+        playBeep("start");
+    }
+
+    function playRadioEnd() {
+        playBeep("end");
+    }
+
     function getTargetTextarea() {
+        // Resolved once and reused; only searched again if Streamlit has
+        // re-rendered the widget and the cached node left the document
+        if (targetField && targetField.isConnected) return targetField;
         const all = [...window.parent.document.querySelectorAll("textarea")];
-        return all.find(t => (t.placeholder || "").includes("Ask Gazoo AI"));
+        targetField = all.find(t => (t.placeholder || "").includes("Ask Gazoo AI"));
+        return targetField;
     }
 
     function setupWaveform() {
-        audioContext = new (window.AudioContext || window.webkitAudioContext)();
-        analyser = audioContext.createAnalyser();
-        analyser.fftSize = 64;
+        analyser = getAudioContext().createAnalyser();
+        // Smallest analyser window; the bars only show the amplitude envelope
+        analyser.fftSize = 32;
+        const session = analyser;
 
         navigator.mediaDevices.getUserMedia({ audio: true }).then(stream => {
+            if (!recognizing || analyser !== session) {
+                // Stopped (or stopped and restarted) before the mic came up;
+                // the current session opens its own stream
+                stream.getTracks().forEach(t => t.stop());
+                return;
+            }
             micSource = audioContext.createMediaStreamSource(stream);
             micSource.connect(analyser);
             drawWaveform();
         });
     }
 
-    function drawWaveform() {
-        const canvas = document.getElementById("waveformCanvas");
-        const ctx = canvas.getContext("2d");
-        const bufferLength = analyser.frequencyBinCount;
-        const data = new Uint8Array(bufferLength);
-
-        function draw() {
-            animationId = requestAnimationFrame(draw);
-            analyser.getByteFrequencyData(data);
-
-            ctx.fillStyle = "#000";
-            ctx.fillRect(0, 0, canvas.width, canvas.height);
-
-            let barWidth = canvas.width / bufferLength;
-            let x = 0;
-            for (let i = 0; i < bufferLength; i++) {
-                let h = data[i];
-                ctx.fillStyle = `rgb(${h+50},40,40)`;
-                ctx.fillRect(x, canvas.height - h/2, barWidth, h/2);
-                x += barWidth + 1;
+    // Paints one frame of bars; also shipped to the worker as source text
+    function makeBarPainter(ctx, n, dpr) {
+        // Draw in CSS pixels onto a device-pixel backing store
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        const W = ctx.canvas.width / dpr;
+        const H = ctx.canvas.height / dpr;
+        const barWidth = W / n;
+        const xs = new Float32Array(n);
+        for (let i = 1; i < n; i++) xs[i] = xs[i - 1] + barWidth + 1;
+
+        // Background once; after that each frame only touches the bar columns:
+        // clear above the bar (opaque canvas, so clearRect leaves black), fill the bar
+        ctx.fillStyle = "#000";
+        ctx.fillRect(0, 0, W, H);
+        return function paint(data) {
+            for (let i = 0; i < n; i++) {
+                let h = Math.min(255, Math.abs(data[i] - 128) * 2);
+                ctx.clearRect(xs[i], 0, barWidth, H - h/2);
+                ctx.fillStyle = BAR_COLORS[h];
+                ctx.fillRect(xs[i], H - h/2, barWidth, h/2);
             }
+        };
+    }
+
+    // Once the canvas has been handed to a worker it can't be drawn on here
+    // again, so the worker is kept for later sessions
+    let waveformWorker = null;
+
+    function waveformWorkerSource(n) {
+        return `
+            const BAR_COLORS = ${JSON.stringify(BAR_COLORS)};
+            ${makeBarPainter}
+            let paint = null;
+            onmessage = e => {
+                if (e.data.canvas) {
+                    // Opaque canvas (painted black every frame): no alpha blending
+                    const ctx = e.data.canvas.getContext("2d", { alpha: false });
+                    paint = makeBarPainter(ctx, ${n}, e.data.dpr);
+                } else if (paint) {
+                    paint(e.data);
+                }
+            };`;
+    }
+
+    // Backing store in device pixels so the compositor doesn't upscale every
+    // frame. Sized once: a canvas handed to a worker can't be resized here.
+    function deviceScale(canvas) {
+        if (!canvas.dataset.dpr) {
+            const dpr = window.devicePixelRatio || 1;
+            canvas.width = Math.round(canvas.width * dpr);
+            canvas.height = Math.round(canvas.height * dpr);
+            canvas.dataset.dpr = dpr;
         }
-        draw();
+        return Number(canvas.dataset.dpr);
+    }
+
+    function getBarPainter(canvas, n) {
+        const dpr = deviceScale(canvas);
+        // Paint in a worker off an OffscreenCanvas when the browser allows it,
+        // so bar drawing never delays speech results on the main thread.
+        // The analyser can't leave the main thread; each frame posts a copy of
+        // its n bytes instead (SharedArrayBuffer needs cross-origin isolation,
+        // which the component iframe doesn't have).
+        if (!waveformWorker && window.Worker && canvas.transferControlToOffscreen) {
+            try {
+                const src = new Blob([waveformWorkerSource(n)], { type: "text/javascript" });
+                const worker = new Worker(URL.createObjectURL(src));
+                const off = canvas.transferControlToOffscreen();
+                worker.postMessage({ canvas: off, dpr }, [off]);
+                waveformWorker = worker;
+            } catch (e) {
+                console.log("Waveform worker unavailable:", e);
+            }
+        }
+        if (waveformWorker) return data => waveformWorker.postMessage(data);
+        return makeBarPainter(canvas.getContext("2d", { alpha: false }), n, dpr);
+    }
+
+    // Sample buffer and painter: fixed per session, set up once in drawWaveform
+    let waveformData = null;
+    let paintWaveform = null;
+
+    function drawFrame() {
+        if (!recognizing || !analyser) return;
+        // Raw samples, no FFT: bar height is distance from the 128 midline
+        analyser.getByteTimeDomainData(waveformData);
+        paintWaveform(waveformData);
+    }
+
+    function startWaveformTimer() {
+        // A fixed wall-clock timer rather than rAF: rAF would wake at the
+        // display rate (60-120 Hz) only to skip most frames; bars need ~20 fps
+        clearInterval(waveformTimer);
+        waveformTimer = setInterval(drawFrame, WAVEFORM_FRAME_MS);
+    }
+
+    function drawWaveform() {
+        const bufferLength = analyser.frequencyBinCount;  // 16 bars
+        waveformData = new Uint8Array(bufferLength);
+        paintWaveform = getBarPainter(document.getElementById("waveformCanvas"), bufferLength);
+        startWaveformTimer();
+    }
+
+    // While the tab is hidden, stop the paint loop and unplug the mic from the
+    // analyser; recognition itself keeps running
+    document.addEventListener("visibilitychange", () => {
+        if (!recognizing || !micSource) return;
+        if (document.hidden) {
+            clearInterval(waveformTimer);
+            waveformTimer = null;
+            micSource.disconnect(analyser);
+        } else if (!waveformTimer) {
+            micSource.connect(analyser);
+            startWaveformTimer();
+        }
+    });
+
+    // Each "input" event makes Streamlit re-render the widget; interim results
+    // arrive several times a second, so write at most once per frame
+    // Only the changed tail is written (new final text plus the replacement
+    // interim), so long dictations don't rebuild and reassign the whole value
+    function flushTranscript() {
+        writeScheduled = false;
+        const field = getTargetTextarea();
+        if (!field) return;
+        if (field !== writtenField || field.value.length !== committedLen + interimLen) {
+            // New session, re-rendered widget or edited text: rewrite it whole
+            field.value = "";
+            writtenField = field;
+            committedLen = 0;
+            interimLen = 0;
+            unwrittenFinal = finalTranscript;
+        }
+        const start = committedLen;
+        const interim = finalTranscript && pendingInterim ? " " + pendingInterim : pendingInterim;
+        if (!unwrittenFinal && field.value.slice(start) === interim) return;
+        field.setRangeText(unwrittenFinal + interim, start, start + interimLen, "end");
+        committedLen += unwrittenFinal.length;
+        interimLen = interim.length;
+        unwrittenFinal = "";
+        field.dispatchEvent(new Event("input", { bubbles: true }));
     }
 
     function startVoice() {
@@ -108,29 +296,75 @@ def voice_input_with_waveform():
         recognition.lang = "en-US";
 
         recognizing = true;
+        restartDelay = 0;
+        writtenField = null;  // first write of a session replaces the field
         if (statusEl) statusEl.innerHTML = "Listening…";
 
         setupWaveform();
         recognition.start();
+        getTargetTextarea();
 
         recognition.onresult = function(evt) {
+            restartDelay = 0;
             let interim = "";
+            let sawFinal = false;
             for (let i = evt.resultIndex; i < evt.results.length; ++i) {
                 if (evt.results[i].isFinal) {
-                    finalTranscript += evt.results[i][0].transcript + " ";
+                    // Trimmed and space-joined, so the field never ends in a space
+                    const phrase = evt.results[i][0].transcript.trim();
+                    if (phrase) {
+                        const joined = (finalTranscript ? " " : "") + phrase;
+                        finalTranscript += joined;
+                        unwrittenFinal += joined;
+                    }
+                    sawFinal = true;
                 } else {
                     interim += evt.results[i][0].transcript;
                 }
             }
-            const field = getTargetTextarea();
-            if (field) {
-                field.value = (finalTranscript + " " + interim).trim();
-                field.dispatchEvent(new Event("input", { bubbles: true }));
+            // A continuous session's result list grows for as long as it runs
+            // and recognition slows with it. After a finished phrase followed
+            // by silence, end the session; onend starts a fresh one. The
+            // transcript so far lives in finalTranscript, so nothing is lost.
+            clearTimeout(restartTimer);
+            if (sawFinal && !interim) {
+                restartTimer = setTimeout(() => recognition.stop(), RESTART_AFTER_SILENCE_MS);
+            }
+            pendingInterim = interim.trim();
+            if (!writeScheduled) {
+                writeScheduled = true;
+                requestAnimationFrame(flushTranscript);
             }
         };
 
-        recognition.onerror = e => console.log("Speech error:", e);
-        recognition.onend = () => stopVoice();
+        recognition.onerror = e => {
+            console.log("Speech error:", e);
+            if (e.error === "no-speech" || e.error === "network") {
+                // Transient: onend retries, backing off so a flaky connection
+                // doesn't spin in a tight restart loop
+                restartDelay = restartDelay
+                    ? Math.min(restartDelay * 2, RESTART_BACKOFF_MAX_MS)
+                    : RESTART_BACKOFF_MIN_MS;
+            } else if (e.error !== "aborted") {
+                // Permission/capture problems would just fail again on restart
+                stopVoice();
+            }
+        };
+        recognition.onend = () => {
+            if (!recognizing) return;
+            pendingInterim = "";
+            flushTranscript();
+            const session = recognition;
+            setTimeout(() => {
+                // Skip if Stop (or Stop + Start) happened during the delay
+                if (!recognizing || recognition !== session) return;
+                try {
+                    session.start();
+                } catch (err) {
+                    console.log("Speech restart failed:", err);
+                }
+            }, restartDelay);
+        };
     }
 
     function stopVoice() {
@@ -139,17 +373,48 @@ def voice_input_with_waveform():
         recognizing = false;
 
         playRadioEnd();
+        clearTimeout(restartTimer);
         if (recognition) recognition.stop();
-        if (animationId) cancelAnimationFrame(animationId);
+        clearInterval(waveformTimer);
+        waveformTimer = null;
+        // Keep the context for the next session; just unplug (and release) the mic
+        if (micSource) {
+            micSource.disconnect();
+            micSource.mediaStream.getTracks().forEach(t => t.stop());
+            micSource = null;
+        }
+        if (analyser) {
+            analyser.disconnect();
+            analyser = null;
+        }
+        // Park the context's audio thread once the end beep has played;
+        // getAudioContext() resumes it on the next start
+        setTimeout(() => {
+            if (!recognizing && audioContext) audioContext.suspend();
+        }, IDLE_SUSPEND_MS);
         if (statusEl) statusEl.innerHTML = "Stopped";
     }
+
+    // Listeners instead of inline onclick. pointerup lets the buttons respond
+    // without waiting for the synthesized click, and still counts as a user
+    // gesture (for mic, speech and audio) on touch as well as mouse;
+    // click covers keyboard presses. Start/stop ignore repeats, so a click
+    // after the pointerup is a no-op.
+    document.addEventListener("DOMContentLoaded", () => {
+        const actions = { start: startVoice, stop: stopVoice };
+        document.querySelectorAll("[data-action]").forEach(button => {
+            const run = () => actions[button.dataset.action]();
+            button.addEventListener("pointerup", run, { passive: true });
+            button.addEventListener("click", run, { passive: true });
+        });
+    });
     </script>
 
     <div>
-      <button onclick="startVoice()" style="padding:8px 16px;border-radius:10px;background:#f44336;color:white;border:none;font-weight:700;cursor:pointer;">
+      <button data-action="start" style="padding:8px 16px;border-radius:10px;background:#f44336;color:white;border:none;font-weight:700;cursor:pointer;">
         Start Voice
       </button>
-      <button onclick="stopVoice()" style="padding:8px 16px;border-radius:10px;background:#444;color:white;border:none;font-weight:700;cursor:pointer;margin-left:10px;">
+      <button data-action="stop" style="padding:8px 16px;border-radius:10px;background:#444;color:white;border:none;font-weight:700;cursor:pointer;margin-left:10px;">
         Stop
       </button>
 
@@ -158,7 +423,7 @@ def voice_input_with_waveform():
       </div>
 
       <canvas id="waveformCanvas" width="500" height="80"
-              style="margin-top:10px;background:#000;border-radius:8px;"></canvas>
+              style="width:500px;height:80px;margin-top:10px;background:#000;border-radius:8px;will-change:transform;contain:strict;"></canvas>
     </div>
     """
 